@@ -1,4 +1,7 @@
+import os
 import reflex as rx
+from app.data.loader import preload_catalog
+from app.data.user_lists import flush_user_lists
 from app.states.dashboard_state import DashboardState
 from app.states.navigation_state import NavigationState
 from app.pages.dashboard import dashboard_page
@@ -18,6 +21,9 @@ app = rx.App(
         ),
     ],
 )
+if os.getenv("PRELOAD_CATALOG", "").lower() in ("1", "true", "yes"):
+    app.register_lifespan_task(preload_catalog)
+app.register_lifespan_task(flush_user_lists)
 app.add_page(
     dashboard_page,
     route="/",
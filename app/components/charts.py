@@ -1,4 +1,5 @@
 import reflex as rx
+from typing import Callable
 from app.states.dashboard_state import DashboardState
 
 TOOLTIP_PROPS = {
@@ -173,10 +174,15 @@ def charts_grid() -> rx.Component:
     )
 
 
-def top_products_table() -> rx.Component:
+def ranked_products_table(
+    title: str,
+    products: rx.Var,
+    value_header: str,
+    value: Callable[[rx.Var], rx.Var],
+) -> rx.Component:
     return rx.el.div(
         rx.el.h3(
-            "Top 10 Most Expensive Products",
+            title,
             class_name="text-lg font-semibold text-gray-800 mb-4",
         ),
         rx.el.div(
@@ -192,7 +198,7 @@ def top_products_table() -> rx.Component:
                             class_name="text-left text-sm font-semibold text-gray-600 p-3",
                         ),
                         rx.el.th(
-                            "Price",
+                            value_header,
                             class_name="text-right text-sm font-semibold text-gray-600 p-3",
                         ),
                         class_name="border-b border-gray-200",
@@ -200,7 +206,7 @@ def top_products_table() -> rx.Component:
                 ),
                 rx.el.tbody(
                     rx.foreach(
-                        DashboardState.top_10_expensive_products,
+                        products,
                         lambda product: rx.el.tr(
                             rx.el.td(
                                 product["title"],
@@ -213,7 +219,7 @@ def top_products_table() -> rx.Component:
                                 )
                             ),
                             rx.el.td(
-                                f"${product['numeric_price'].to_string()}",
+                                value(product),
                                 class_name="p-3 text-sm text-gray-800 text-right font-medium",
                             ),
                             class_name="border-b border-gray-100 hover:bg-gray-50",
@@ -224,4 +230,31 @@ def top_products_table() -> rx.Component:
             class_name="overflow-x-auto rounded-lg border border-gray-200",
         ),
         class_name="bg-white p-6 rounded-xl border border-gray-200 shadow-sm",
-    )
\ No newline at end of file
+    )
+
+
+def top_products_table() -> rx.Component:
+    return ranked_products_table(
+        "Top 10 Most Expensive Products",
+        DashboardState.top_10_expensive_products,
+        "Price",
+        lambda product: f"${product['numeric_price'].to_string()}",
+    )
+
+
+def top_discounted_table() -> rx.Component:
+    return ranked_products_table(
+        "Top 10 Discounted Products",
+        DashboardState.top_10_discounted_products,
+        "Discount",
+        lambda product: f"{product['discount_value'].to_string()}% off",
+    )
+
+
+def most_colors_table() -> rx.Component:
+    return ranked_products_table(
+        "Top 10 Products by Color Options",
+        DashboardState.top_10_colorful_products,
+        "Colors",
+        lambda product: product["color_count"].to_string(),
+    )
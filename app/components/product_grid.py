@@ -1,5 +1,18 @@
 import reflex as rx
-from app.states.product_state import ProductState, Product
+from reflex.components.el.elements.forms import Input
+from reflex.event import input_event
+from app.states.product_state import (
+    ProductState,
+    Product,
+    Suggestion,
+    SEARCH_INPUT_ID,
+)
+
+
+class SearchInput(Input):
+    """A text input that also reports every keystroke through `on_input`."""
+
+    on_input: rx.EventHandler[input_event]
 
 
 def product_card(product: Product) -> rx.Component:
@@ -62,17 +75,50 @@ def product_list_view() -> rx.Component:
     )
 
 
+def search_suggestion(suggestion: Suggestion) -> rx.Component:
+    return rx.el.li(
+        rx.cond(
+            suggestion["kind"] == "category",
+            rx.icon("tag", class_name="h-4 w-4 text-emerald-600"),
+            rx.icon("search", class_name="h-4 w-4 text-gray-400"),
+        ),
+        rx.el.span(suggestion["text"], class_name="flex-1 truncate"),
+        rx.el.span(suggestion["count"], class_name="text-xs text-gray-400"),
+        on_mouse_down=ProductState.apply_suggestion(suggestion),
+        class_name="flex items-center gap-2 px-3 py-2 text-sm cursor-pointer hover:bg-gray-50",
+    )
+
+
+def search_box() -> rx.Component:
+    return rx.el.div(
+        SearchInput.create(
+            id=SEARCH_INPUT_ID,
+            placeholder="Search products...",
+            on_change=ProductState.set_search_query.debounce(300),
+            on_input=ProductState.set_search_input,
+            on_blur=ProductState.hide_suggestions,
+            default_value=ProductState.search_query,
+            auto_complete="off",
+            class_name="w-full md:w-64 pl-4 pr-4 py-2 border rounded-lg text-sm",
+        ),
+        rx.cond(
+            ProductState.search_suggestions.length() > 0,
+            rx.el.ul(
+                rx.foreach(ProductState.search_suggestions, search_suggestion),
+                class_name="absolute z-10 mt-1 w-full md:w-64 bg-white border rounded-lg shadow-lg",
+            ),
+        ),
+        class_name="relative",
+    )
+
+
 def product_view_controls() -> rx.Component:
     return rx.el.div(
         rx.el.div(
-            rx.el.input(
-                placeholder="Search products...",
-                on_change=ProductState.set_search_query.debounce(300),
-                default_value=ProductState.search_query,
-                class_name="w-full md:w-64 pl-4 pr-4 py-2 border rounded-lg text-sm",
-            ),
+            search_box(),
             rx.el.select(
                 rx.el.option("Default Sort", value="default"),
+                rx.el.option("Best Match", value="relevance"),
                 rx.el.option("Price: Low to High", value="price_asc"),
                 rx.el.option("Price: High to Low", value="price_desc"),
                 rx.el.option("Biggest Discount", value="discount_desc"),
@@ -85,7 +131,7 @@ def product_view_controls() -> rx.Component:
             class_name="flex flex-col md:flex-row gap-4",
         ),
         rx.el.div(
-            rx.el.p(f"{ProductState.filtered_products.length()} results"),
+            rx.el.p(f"{ProductState.filtered_count} results"),
             rx.el.button(
                 rx.icon("grid-3x3"),
                 on_click=ProductState.set_view_mode("grid"),
@@ -0,0 +1,268 @@
+from dataclasses import dataclass, replace
+from typing import Sequence
+
+import numpy as np
+
+from app.data.table import ProductTable
+
+# Lower edges of each metric's facet buckets; the last bucket is open-ended.
+BUCKET_EDGES = {
+    "price": np.array([0, 10, 25, 50, 100, 250], dtype=np.float64),
+    "discount": np.array([0, 10, 20, 30, 50], dtype=np.float64),
+}
+
+
+@dataclass(frozen=True)
+class Kpis:
+    """The dashboard's headline figures for one selection of products."""
+
+    total_products: int = 0
+    average_price: float = 0.0
+    total_categories: int = 0
+    average_discount: float = 0.0
+    products_with_discounts: int = 0
+    avg_colors: float = 0.0
+
+
+def compute_kpis(table: ProductTable, indices: np.ndarray) -> Kpis:
+    """Every dashboard KPI for the rows at `indices`, gathering each column once.
+
+    Averages only count rows where the value is positive, as the dashboard
+    always has.
+    """
+    prices = table.numeric_price[indices]
+    discounts = table.discount_value[indices]
+    colors = table.color_count[indices]
+    category_sizes = np.bincount(
+        table.category_codes[indices], minlength=len(table.categories)
+    )
+    prices = prices[prices > 0]
+    discounts = discounts[discounts > 0]
+    colors = colors[colors > 0]
+    return Kpis(
+        total_products=len(indices),
+        average_price=(
+            round(float(prices.sum()) / len(prices), 2) if len(prices) else 0.0
+        ),
+        total_categories=int(np.count_nonzero(category_sizes)),
+        average_discount=(
+            round(float(discounts.sum()) / len(discounts), 2) if len(discounts) else 0.0
+        ),
+        products_with_discounts=len(discounts),
+        avg_colors=round(int(colors.sum()) / len(colors), 1) if len(colors) else 0.0,
+    )
+
+
+@dataclass(frozen=True)
+class CategoryGroups:
+    """Per-category sums and counts of one selection, indexed by category code.
+
+    Each `<column>_count` counts only the rows where that value is positive,
+    the rows the dashboard's averages are taken over.
+    """
+
+    categories: tuple[str, ...]
+    product_count: np.ndarray
+    first_row: np.ndarray
+    price_sum: np.ndarray
+    price_count: np.ndarray
+    discount_sum: np.ndarray
+    discount_count: np.ndarray
+    color_sum: np.ndarray
+    color_count: np.ndarray
+
+    def mean(self, column: str) -> np.ndarray:
+        """Per-category mean of the positive `column` values, NaN where there are none."""
+        sums = getattr(self, f"{column}_sum")
+        counts = getattr(self, f"{column}_count")
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return sums / counts
+
+    def restrict(self, selected: np.ndarray) -> "CategoryGroups":
+        """These aggregates with every category outside the boolean `selected` emptied."""
+        return replace(
+            self,
+            product_count=np.where(selected, self.product_count, 0),
+            price_sum=np.where(selected, self.price_sum, 0),
+            price_count=np.where(selected, self.price_count, 0),
+            discount_sum=np.where(selected, self.discount_sum, 0),
+            discount_count=np.where(selected, self.discount_count, 0),
+            color_sum=np.where(selected, self.color_sum, 0),
+            color_count=np.where(selected, self.color_count, 0),
+        )
+
+
+def _positive_sums(
+    codes: np.ndarray, values: np.ndarray, size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Per-code sum and count of the positive `values`."""
+    positive = values > 0
+    # fmax turns non-positive values and NaN into 0, which leaves each sum unchanged.
+    sums = np.bincount(codes, np.fmax(values, 0), minlength=size)
+    return sums, np.bincount(codes, positive, minlength=size).astype(np.int64)
+
+
+def group_by_category(table: ProductTable, indices: np.ndarray) -> CategoryGroups:
+    """Aggregate price, discount and colours per category over the rows at `indices`.
+
+    Every figure is one `np.bincount` over the category codes. Sums add
+    values in row order, exactly as a Python loop over the rows would.
+    """
+    size = len(table.categories)
+    if len(indices) == len(table):
+        # `indices` is every row, so the columns need no gathering.
+        indices = slice(None)
+    codes = table.category_codes[indices]
+    # A category first appears where the code changes from the previous row.
+    changes = np.ones(len(codes), dtype=bool)
+    changes[1:] = codes[1:] != codes[:-1]
+    starts = np.flatnonzero(changes)
+    first_row = np.full(size, len(codes), dtype=np.int64)
+    np.minimum.at(first_row, codes[starts], starts)
+    price_sum, price_count = _positive_sums(codes, table.numeric_price[indices], size)
+    discount_sum, discount_count = _positive_sums(
+        codes, table.discount_value[indices], size
+    )
+    color_sum, color_count = _positive_sums(codes, table.color_count[indices], size)
+    return CategoryGroups(
+        categories=table.categories,
+        product_count=np.bincount(codes, minlength=size),
+        first_row=first_row,
+        price_sum=price_sum,
+        price_count=price_count,
+        discount_sum=discount_sum,
+        discount_count=discount_count,
+        color_sum=color_sum,
+        color_count=color_count,
+    )
+
+
+def bucketize(metric: str, values: np.ndarray) -> np.ndarray:
+    """The `BUCKET_EDGES[metric]` bucket of each value; NaN and values below
+    the first edge fall in the first bucket."""
+    edges = BUCKET_EDGES[metric]
+    return np.searchsorted(edges, np.fmax(values, edges[0]), side="right") - 1
+
+
+def bucket_labels(metric: str, prefix: str = "", suffix: str = "") -> list[str]:
+    """Display labels of the `BUCKET_EDGES[metric]` buckets, e.g. "$10-25" and "$250+"."""
+    edges = [f"{edge:g}" for edge in BUCKET_EDGES[metric].tolist()]
+    return [f"{prefix}{low}-{high}{suffix}" for low, high in zip(edges, edges[1:])] + [
+        f"{prefix}{edges[-1]}{suffix}+"
+    ]
+
+
+@dataclass(frozen=True)
+class Facets:
+    """Product counts per filter option, each under every other active filter.
+
+    `discount_buckets[0]` counts products without a discount and the rest
+    follow `BUCKET_EDGES["discount"]`; `price_buckets` follow
+    `BUCKET_EDGES["price"]`.
+    """
+
+    categories: np.ndarray
+    discount_buckets: np.ndarray
+    price_buckets: np.ndarray
+
+
+def compute_facets(
+    table: ProductTable,
+    rows: np.ndarray,
+    categories: Sequence[str] = (),
+    price_range: Sequence[float] | None = None,
+    discounts_only: bool = False,
+) -> Facets:
+    """Facet counts over `rows`, the products matching the search.
+
+    Each facet ignores its own filter: category counts apply the price and
+    discount filters, discount buckets the category and price filters, and
+    price buckets the category and discount filters. The columns are
+    gathered and each predicate evaluated once for all three facets.
+    """
+    codes = table.category_codes[rows]
+    prices = table.numeric_price[rows]
+    discounts = table.discount_value[rows]
+    everything = np.ones(len(rows), dtype=bool)
+    in_categories = (
+        table.category_selection(categories)[codes] if categories else everything
+    )
+    in_price = everything
+    if price_range is not None:
+        in_price = (prices >= price_range[0]) & (prices <= price_range[1])
+    discounted = discounts > 0
+    in_discount = discounted if discounts_only else everything
+    discount_buckets = np.where(discounted, bucketize("discount", discounts) + 1, 0)
+    return Facets(
+        categories=np.bincount(
+            codes[in_price & in_discount], minlength=len(table.categories)
+        ),
+        discount_buckets=np.bincount(
+            discount_buckets[in_categories & in_price],
+            minlength=len(BUCKET_EDGES["discount"]) + 1,
+        ),
+        price_buckets=np.bincount(
+            bucketize("price", prices[in_categories & in_discount]),
+            minlength=len(BUCKET_EDGES["price"]),
+        ),
+    )
+
+
+@dataclass(frozen=True)
+class CategoryPartials:
+    """Per-category aggregates materialized once per catalog.
+
+    Each pair holds the aggregates over every product first, then over the
+    discounted products only. Any mix of category and discount filters is
+    answered by picking one and masking categories in O(#categories), with
+    sums identical to scanning the matching rows.
+    """
+
+    groups: tuple[CategoryGroups, CategoryGroups]
+
+    @classmethod
+    def build(cls, table: ProductTable) -> "CategoryPartials":
+        selections = (
+            np.arange(len(table)),
+            np.flatnonzero(table.discount_value > 0),
+        )
+        return cls(groups=tuple(group_by_category(table, rows) for rows in selections))
+
+    def category_groups(
+        self, selected: np.ndarray | None, discounts_only: bool
+    ) -> CategoryGroups:
+        """Aggregates over the `selected` categories (all if None)."""
+        groups = self.groups[discounts_only]
+        return groups if selected is None else groups.restrict(selected)
+
+
+def category_stats(groups: CategoryGroups) -> list[dict[str, str | int | float]]:
+    """Average price, discount and colours per category present in `groups`.
+
+    Categories are listed in the order their first row appears.
+    """
+    stats = []
+    for code in np.argsort(groups.first_row, kind="stable").tolist():
+        if not groups.product_count[code]:
+            continue
+        price_count = int(groups.price_count[code])
+        discount_count = int(groups.discount_count[code])
+        color_count = int(groups.color_count[code])
+        stats.append(
+            {
+                "name": groups.categories[code],
+                "avg_price": round(float(groups.price_sum[code]) / price_count, 2)
+                if price_count > 0
+                else 0,
+                "avg_discount": round(
+                    float(groups.discount_sum[code]) / discount_count, 2
+                )
+                if discount_count > 0
+                else 0,
+                "product_count": int(groups.product_count[code]),
+                "avg_colors": round(float(groups.color_sum[code]) / color_count, 1)
+                if color_count > 0
+                else 0,
+            }
+        )
+    return stats
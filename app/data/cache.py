@@ -0,0 +1,191 @@
+import io
+import os
+import json
+import shutil
+import hashlib
+import logging
+from typing import Any
+
+import numpy as np
+
+CACHE_FORMAT_VERSION = 3
+NUMERIC_COLUMNS = {
+    "id": np.int64,
+    "numeric_price": np.float64,
+    "discount_value": np.float64,
+    "color_count": np.int64,
+}
+TEXT_COLUMNS = ["title", "price_str", "discount_str", "selling_proposition"]
+MANIFEST = "manifest.json"
+
+
+def catalog_cache_dir() -> str:
+    """Where normalized catalogs are cached, from `CATALOG_CACHE_DIR`."""
+    return os.getenv("CATALOG_CACHE_DIR", ".catalog_cache")
+
+
+def catalog_cache_key(path: str, files: list[str]) -> str:
+    """A key that changes whenever the dataset path, file list or any file changes."""
+    fingerprint = [CACHE_FORMAT_VERSION, os.path.abspath(path)]
+    for file in files:
+        stat = os.stat(os.path.join(path, file))
+        fingerprint.append([file, stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha256(json.dumps(fingerprint).encode()).hexdigest()[:32]
+
+
+def _write_text_column(directory: str, name: str, values: list[str | None]) -> None:
+    """Store strings as one UTF-8 blob plus character offsets and a missing mask."""
+    missing = np.array([v is None for v in values], dtype=bool)
+    texts = ["" if v is None else v for v in values]
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    with open(
+        os.path.join(directory, f"{name}.txt"), "w", encoding="utf-8", newline=""
+    ) as f:
+        f.write("".join(texts))
+    np.save(os.path.join(directory, f"{name}.offsets.npy"), offsets)
+    np.save(os.path.join(directory, f"{name}.missing.npy"), missing)
+
+
+def _file_digests(directory: str) -> dict[str, str]:
+    """SHA-256 of every column file in `directory`."""
+    digests = {}
+    for file in sorted(os.listdir(directory)):
+        if file != MANIFEST:
+            with open(os.path.join(directory, file), "rb") as f:
+                digests[file] = hashlib.sha256(f.read()).hexdigest()
+    return digests
+
+
+def _read_verified(directory: str, file: str, digests: dict[str, str]) -> bytes:
+    """The contents of `file`, checked against its digest in the manifest."""
+    with open(os.path.join(directory, file), "rb") as f:
+        data = f.read()
+    if hashlib.sha256(data).hexdigest() != digests[file]:
+        raise ValueError(f"{file} does not match its digest")
+    return data
+
+
+def _load_array(directory: str, file: str, digests: dict[str, str]) -> np.ndarray:
+    return np.load(io.BytesIO(_read_verified(directory, file, digests)))
+
+
+def _read_text_column(
+    directory: str, name: str, rows: int, digests: dict[str, str]
+) -> list[str | None]:
+    text = _read_verified(directory, f"{name}.txt", digests).decode("utf-8")
+    offsets = _load_array(directory, f"{name}.offsets.npy", digests)
+    missing = _load_array(directory, f"{name}.missing.npy", digests)
+    if offsets.shape != (rows + 1,) or missing.shape != (rows,):
+        raise ValueError(f"column {name} has the wrong length")
+    if offsets[-1] != len(text):
+        raise ValueError(f"column {name} is truncated")
+    bounds = offsets.tolist()
+    return [
+        None if is_missing else text[start:end]
+        for start, end, is_missing in zip(bounds, bounds[1:], missing.tolist())
+    ]
+
+
+def write_catalog_cache(key: str, products: list[dict[str, Any]]) -> None:
+    """Cache `products` column-wise under `key`, replacing older caches.
+
+    Columns are written to a scratch directory that is renamed into place
+    once the manifest is on disk, so readers never see a partial cache.
+    """
+    cache_dir = catalog_cache_dir()
+    target = os.path.join(cache_dir, key)
+    scratch = f"{target}.tmp-{os.getpid()}"
+    os.makedirs(scratch, exist_ok=True)
+    try:
+        categories = sorted({p["category"] for p in products})
+        codes = {category: code for code, category in enumerate(categories)}
+        np.save(
+            os.path.join(scratch, "category.npy"),
+            np.array([codes[p["category"]] for p in products], dtype=np.int32),
+        )
+        for name, dtype in NUMERIC_COLUMNS.items():
+            np.save(
+                os.path.join(scratch, f"{name}.npy"),
+                np.array([p[name] for p in products], dtype=dtype),
+            )
+        for name in TEXT_COLUMNS:
+            _write_text_column(scratch, name, [p[name] for p in products])
+        with open(os.path.join(scratch, MANIFEST), "w") as f:
+            json.dump(
+                {
+                    "version": CACHE_FORMAT_VERSION,
+                    "key": key,
+                    "rows": len(products),
+                    "categories": categories,
+                    "digests": _file_digests(scratch),
+                },
+                f,
+            )
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(scratch, target)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    for entry in os.listdir(cache_dir):
+        if entry != key and ".tmp-" not in entry:
+            shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+    logging.info(f"Cached {len(products)} products in {target}.")
+
+
+def read_catalog_cache(key: str) -> list[dict[str, Any]] | None:
+    """The cached products for `key`, or None if there is no usable cache.
+
+    Every column file is checked against the digest recorded in the
+    manifest. A cache that fails to load or does not match its manifest is
+    deleted so the next ingest rebuilds it.
+    """
+    target = os.path.join(catalog_cache_dir(), key)
+    if not os.path.isdir(target):
+        return None
+    try:
+        with open(os.path.join(target, MANIFEST)) as f:
+            manifest = json.load(f)
+        if manifest["version"] != CACHE_FORMAT_VERSION or manifest["key"] != key:
+            raise ValueError("manifest does not match the cache key")
+        rows = manifest["rows"]
+        categories = manifest["categories"]
+        digests = manifest["digests"]
+        columns = {}
+        for name in ["category", *NUMERIC_COLUMNS]:
+            columns[name] = _load_array(target, f"{name}.npy", digests)
+            if columns[name].shape != (rows,):
+                raise ValueError(f"column {name} has the wrong length")
+        texts = {
+            name: _read_text_column(target, name, rows, digests)
+            for name in TEXT_COLUMNS
+        }
+        products = [
+            {
+                "id": product_id,
+                "category": categories[code],
+                "title": title,
+                "price_str": price_str,
+                "numeric_price": numeric_price,
+                "discount_str": discount_str,
+                "discount_value": discount_value,
+                "color_count": color_count,
+                "selling_proposition": selling_proposition,
+            }
+            for product_id, code, title, price_str, numeric_price, discount_str, discount_value, color_count, selling_proposition in zip(
+                columns["id"].tolist(),
+                columns["category"].tolist(),
+                texts["title"],
+                texts["price_str"],
+                columns["numeric_price"].tolist(),
+                texts["discount_str"],
+                columns["discount_value"].tolist(),
+                columns["color_count"].tolist(),
+                texts["selling_proposition"],
+            )
+        ]
+    except Exception as e:
+        logging.warning(f"Discarding unreadable catalog cache {target}: {e}")
+        shutil.rmtree(target, ignore_errors=True)
+        return None
+    logging.info(f"Loaded {len(products)} products from catalog cache {target}.")
+    return products
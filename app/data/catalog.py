@@ -0,0 +1,84 @@
+from dataclasses import dataclass, field
+from typing import Iterable, TypedDict
+
+import numpy as np
+
+from app.data.aggregates import CategoryPartials
+from app.data.table import ProductTable
+
+
+class Product(TypedDict):
+    id: int
+    category: str
+    title: str
+    price_str: str
+    numeric_price: float
+    discount_str: str | None
+    discount_value: float
+    color_count: int
+    selling_proposition: str | None
+
+
+@dataclass(frozen=True, eq=False)
+class Catalog:
+    """An immutable snapshot of the product catalog, shared by every session.
+
+    States only keep the `version` of the catalog they were loaded with and
+    look the data up here, so per-session state does not grow with it.
+    """
+
+    version: str = ""
+    products: tuple[Product, ...] = ()
+    categories: tuple[str, ...] = ()
+    max_price: float = 0.0
+    table: ProductTable = field(default_factory=ProductTable)
+    partials: CategoryPartials = field(
+        default_factory=lambda: CategoryPartials.build(ProductTable())
+    )
+
+    @classmethod
+    def from_products(cls, version: str, products: list[Product]) -> "Catalog":
+        table = ProductTable.from_products(products)
+        return cls(
+            version=version,
+            products=tuple(products),
+            categories=table.categories,
+            max_price=float(table.numeric_price.max()) if len(table) else 0.0,
+            table=table,
+            partials=CategoryPartials.build(table),
+        )
+
+    def rows(self, indices: np.ndarray) -> list[Product]:
+        """The products at the given row indices, in that order."""
+        return [self.products[i] for i in indices.tolist()]
+
+    def product(self, product_id: int) -> Product | None:
+        """The product with id `product_id`, or None if this catalog has none."""
+        row = self.table.row_of(product_id)
+        return None if row is None else self.products[row]
+
+    def products_by_id(self, product_ids: Iterable[int]) -> list[Product]:
+        """The products with the given ids, in that order, skipping unknown ids."""
+        rows = (self.table.row_of(product_id) for product_id in product_ids)
+        return [self.products[row] for row in rows if row is not None]
+
+
+EMPTY_CATALOG = Catalog()
+_current_catalog = EMPTY_CATALOG
+
+
+def publish_catalog(version: str, products: list[Product]) -> Catalog:
+    """Make `products` the process-wide catalog under `version`."""
+    global _current_catalog
+    _current_catalog = Catalog.from_products(version, products)
+    return _current_catalog
+
+
+def current_catalog() -> Catalog:
+    return _current_catalog
+
+
+def get_catalog(version: str) -> Catalog:
+    """The catalog published as `version`, or an empty one if it was replaced."""
+    catalog = _current_catalog
+    return catalog if catalog.version == version else EMPTY_CATALOG
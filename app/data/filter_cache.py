@@ -0,0 +1,218 @@
+import dataclasses
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Sequence
+
+import numpy as np
+
+from app.data.catalog import Catalog
+
+FilterKey = tuple[str, str, tuple[str, ...], tuple[float, float] | None, bool, bool]
+
+
+def _nbytes(value: Any) -> int:
+    """The bytes held by the arrays in `value`, looking into tuples, lists and
+    dataclasses; anything else is small enough to leave out."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(item) for item in value)
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return sum(
+            _nbytes(getattr(value, field.name)) for field in dataclasses.fields(value)
+        )
+    return 0
+
+
+class FilterResult:
+    """The rows matching one filter combination, plus values derived from them.
+
+    Derived values (KPIs, category aggregates, ...) are computed on first
+    request and then shared by every session asking for the same filters.
+    `nbytes` counts the index array and every derived array.
+    """
+
+    def __init__(self, indices: np.ndarray):
+        self.indices = indices
+        self.nbytes = indices.nbytes
+        self._derived: dict[str, Any] = {}
+        self._lock = threading.Lock()
+        # Set by the FilterCache holding this result, which counts derived
+        # values against its byte budget.
+        self._on_derived: Callable[[int], None] | None = None
+
+    def __getstate__(self):
+        # A pickled copy is detached from the cache that held the original.
+        state = self.__dict__.copy()
+        del state["_lock"], state["_on_derived"]
+        return state
+
+    def __setstate__(self, state: dict[str, Any]):
+        self.__dict__.update(state, _lock=threading.Lock(), _on_derived=None)
+
+    def derived(self, name: str, compute: Callable[[], Any]) -> Any:
+        if name not in self._derived:
+            value = compute()
+            with self._lock:
+                added = name not in self._derived
+                if added:
+                    self._derived[name] = value
+            if added:
+                if self._on_derived is None:
+                    self.nbytes += _nbytes(value)
+                else:
+                    self._on_derived(_nbytes(value))
+        return self._derived[name]
+
+
+class FilterCache:
+    """A size-bounded LRU of FilterResults, shared by every session in the process.
+
+    Entries are evicted least recently used first once there are more than
+    `max_entries` of them or their arrays, derived values included, exceed
+    `max_bytes`.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[FilterKey, FilterResult] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get_or_compute(
+        self, key: FilterKey, compute: Callable[[], np.ndarray | FilterResult]
+    ) -> FilterResult:
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+            self.misses += 1
+        result = compute()
+        if not isinstance(result, FilterResult):
+            result = FilterResult(result)
+        result._on_derived = lambda size: self._grow(key, result, size)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = result
+                self._bytes += result.nbytes
+            self._evict()
+        return result
+
+    def _grow(self, key: FilterKey, result: FilterResult, size: int):
+        """Count `size` more bytes derived from `result`, evicting if over budget."""
+        with self._lock:
+            result.nbytes += size
+            if self._entries.get(key) is result:
+                self._bytes += size
+                self._evict()
+
+    def _evict(self):
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.nbytes
+
+    def peek(self, key: FilterKey) -> FilterResult | None:
+        """The cached result for `key`, if any, without counting a hit or
+        refreshing its position."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+filter_cache = FilterCache(
+    max_entries=int(os.getenv("FILTER_CACHE_ENTRIES", "256")),
+    max_bytes=int(os.getenv("FILTER_CACHE_MB", "256")) * 1024 * 1024,
+)
+
+
+def filter_key(
+    catalog: Catalog,
+    search: str = "",
+    categories: Sequence[str] = (),
+    price_range: Sequence[float] | None = None,
+    discounts_only: bool = False,
+    ranked: bool = False,
+) -> FilterKey:
+    """The canonical cache key: equivalent filters map to the same key."""
+    return (
+        catalog.version,
+        search.lower(),
+        tuple(sorted(set(categories))),
+        None if price_range is None else (float(price_range[0]), float(price_range[1])),
+        bool(discounts_only),
+        bool(ranked) and bool(search.strip()),
+    )
+
+
+def select_cached(
+    catalog: Catalog,
+    search: str = "",
+    categories: Sequence[str] = (),
+    price_range: Sequence[float] | None = None,
+    discounts_only: bool = False,
+    previous_search: str = "",
+    ranked: bool = False,
+) -> FilterResult:
+    """`catalog.table.select(...)` through the process-wide filter cache.
+
+    If `search` extends `previous_search` and the result for that search
+    with the same other filters is still cached, only its rows are searched,
+    since a title containing the longer query also contains the shorter one.
+
+    With `ranked`, the search matches title terms with typos allowed instead
+    of the exact substring, and the result for the search alone carries each
+    row's BM25 score as `derived("scores", ...)`.
+    """
+    key = filter_key(catalog, search, categories, price_range, discounts_only, ranked)
+
+    def compute() -> np.ndarray | FilterResult:
+        if key[-1]:
+            if key == filter_key(catalog, search, ranked=True):
+                rows, scores = catalog.table.term_index.search(search)
+                result = FilterResult(rows)
+                result.derived("scores", lambda: scores)
+                return result
+            return catalog.table.select(
+                categories=categories,
+                price_range=price_range,
+                discounts_only=discounts_only,
+                within=select_cached(catalog, search, ranked=True).indices,
+            )
+        within = None
+        previous = previous_search.lower()
+        if previous and previous != key[1] and previous in key[1]:
+            base = filter_cache.peek(
+                filter_key(catalog, previous, categories, price_range, discounts_only)
+            )
+            if base is not None:
+                within = base.indices
+        return catalog.table.select(
+            search=search,
+            categories=categories,
+            price_range=price_range,
+            discounts_only=discounts_only,
+            within=within,
+        )
+
+    return filter_cache.get_or_compute(key, compute)
@@ -0,0 +1,250 @@
+import os
+import asyncio
+import logging
+import multiprocessing
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator
+
+import numpy as np
+import pandas as pd
+
+FLOAT_PATTERN = r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?"
+
+
+def category_name_from_file(file: str) -> str:
+    """Turn a dataset file name like `us-shein-men_shoes.csv` into `Men Shoes`."""
+    return file.replace("us-shein-", "").replace(".csv", "").replace("_", " ").title()
+
+
+def _column(df: pd.DataFrame, name: str) -> pd.Series:
+    """A column of `df`, or an all-missing column when the file lacks it."""
+    if name in df.columns:
+        return df[name]
+    return pd.Series(None, index=df.index, dtype=object)
+
+
+def _optional_str(values: pd.Series) -> pd.Series:
+    """`str(v)` for every present value and `None` for missing ones."""
+    return values.astype(str).astype(object).where(values.notna(), None)
+
+
+def _float_or_nan(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def _to_float(values: pd.Series) -> pd.Series:
+    """Column-wise `float()`, yielding NaN wherever `float()` would raise.
+
+    Plain decimal strings are cast in one numpy pass, which goes through the
+    same conversion as `float()` so results are bit-identical. Anything else
+    (whitespace, "inf", "1_000", ...) falls back to `float()` per value.
+    """
+    result = pd.Series(np.nan, index=values.index, dtype=np.float64)
+    if not values.notna().any():
+        return result
+    plain = values.str.fullmatch(FLOAT_PATTERN, na=False).to_numpy(dtype=bool)
+    if plain.any():
+        result[plain] = values[plain].to_numpy(dtype=object).astype(np.float64)
+    other = values.notna().to_numpy(dtype=bool) & ~plain
+    if other.any():
+        result[other] = values[other].map(_float_or_nan).to_numpy(dtype=np.float64)
+    return result
+
+
+def parse_prices(price_str: pd.Series) -> tuple[pd.Series, int]:
+    """Numeric prices from strings like "$1,299.00" or ranges like "12.99-15.99".
+
+    Ranges are averaged. Returns the prices (0.0 where unparseable) and the
+    number of values that could not be parsed.
+    """
+    cleaned = (
+        price_str.str.replace("$", "", regex=False)
+        .str.replace(",", "", regex=False)
+        .str.strip()
+    )
+    is_range = cleaned.str.contains("-", regex=False, na=False)
+    prices = _to_float(cleaned.where(~is_range))
+    if is_range.any():
+        parts = cleaned[is_range].str.split("-", n=2)
+        low = _to_float(parts.str.get(0).str.strip())
+        high = _to_float(parts.str.get(1).str.strip())
+        prices[is_range] = (low + high) / 2
+    failed = prices.isna()
+    return prices.where(~failed, 0.0), int(failed.sum())
+
+
+def parse_discounts(discounts: pd.Series) -> tuple[pd.Series, int]:
+    """Discount percentages from strings like "-30%".
+
+    Non-string values count as no discount, as they always have.
+    """
+    try:
+        cleaned = discounts.str.replace("%", "", regex=False).str.replace(
+            "-", "", regex=False
+        )
+    except AttributeError:
+        return pd.Series(0.0, index=discounts.index), 0
+    values = _to_float(cleaned)
+    failed = cleaned.notna() & values.isna()
+    return values.fillna(0.0), int(failed.sum())
+
+
+def parse_color_counts(color_counts: pd.Series) -> tuple[pd.Series, int]:
+    """Integer color counts; anything that is not a plain digit string is 0."""
+    present = color_counts.notna()
+    as_str = color_counts.astype(str).where(present)
+    is_digit = as_str.str.isdigit().fillna(False).astype(bool)
+    counts = pd.to_numeric(as_str.where(is_digit), errors="coerce").fillna(0)
+    return counts.astype(np.int64), int((present & ~is_digit).sum())
+
+
+def read_category_file(path: str, file: str) -> pd.DataFrame | None:
+    """Read one category CSV with its title column normalized to `title`."""
+    df = pd.read_csv(os.path.join(path, file))
+    if "goods-title-link--jump" in df.columns:
+        df.rename(
+            columns={
+                "goods-title-link--jump": "title",
+                "goods-title-link": "title_alt",
+            },
+            inplace=True,
+        )
+        df["title"] = df["title"].fillna(df["title_alt"])
+    elif "goods-title-link" in df.columns:
+        df.rename(columns={"goods-title-link": "title"}, inplace=True)
+    else:
+        logging.warning(f"Skipping file {file} due to missing title column.")
+        return None
+    return df.dropna(subset=["title", "price"])
+
+
+def normalize_products(
+    df: pd.DataFrame, category_name: str
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """Build `Product` records for one category frame.
+
+    Returns the records and the number of unparseable values per column.
+    """
+    price_str = df["price"].astype(str)
+    numeric_price, price_failures = parse_prices(price_str)
+    discount_raw = _column(df, "discount")
+    discount_value, discount_failures = parse_discounts(discount_raw)
+    color_count, color_failures = parse_color_counts(_column(df, "color-count"))
+    products = [
+        {
+            "category": category_name,
+            "title": title,
+            "price_str": price,
+            "numeric_price": round(value, 2),
+            "discount_str": discount_str,
+            "discount_value": discount,
+            "color_count": colors,
+            "selling_proposition": selling_proposition,
+        }
+        for title, price, value, discount_str, discount, colors, selling_proposition in zip(
+            df["title"].astype(str).tolist(),
+            price_str.tolist(),
+            numeric_price.tolist(),
+            _optional_str(discount_raw).tolist(),
+            discount_value.tolist(),
+            color_count.tolist(),
+            _optional_str(_column(df, "selling_proposition")).tolist(),
+        )
+    ]
+    failures = {
+        "price": price_failures,
+        "discount": discount_failures,
+        "color-count": color_failures,
+    }
+    return products, failures
+
+
+def load_category_file(
+    path: str, file: str
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """Read and normalize one category CSV."""
+    df = read_category_file(path, file)
+    if df is None:
+        return [], {}
+    return normalize_products(df, category_name_from_file(file))
+
+
+def ingest_workers() -> int:
+    """Worker processes for CSV ingestion, from `INGEST_WORKERS` (all CPUs by default)."""
+    workers = os.getenv("INGEST_WORKERS")
+    return int(workers) if workers else os.cpu_count() or 1
+
+
+async def _iter_loaded_files(
+    path: str, files: list[str], workers: int
+) -> AsyncIterator[tuple[str, Any]]:
+    """Yield `(file, result or exception)` pairs as each file finishes loading.
+
+    Parsing always happens off the event loop, in a worker thread or process,
+    so other sessions keep getting their events handled during a load.
+    """
+    if workers <= 1:
+        for file in files:
+            try:
+                yield file, await asyncio.to_thread(load_category_file, path, file)
+            except Exception as e:
+                yield file, e
+        return
+    loop = asyncio.get_running_loop()
+    pool = ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    )
+
+    async def load(file: str) -> tuple[str, Any]:
+        try:
+            return file, await loop.run_in_executor(
+                pool, load_category_file, path, file
+            )
+        except Exception as e:
+            return file, e
+
+    try:
+        for next_loaded in asyncio.as_completed([load(file) for file in files]):
+            yield await next_loaded
+    finally:
+        # Joining the workers can take a while, so keep it off the loop too.
+        await asyncio.to_thread(pool.shutdown)
+
+
+async def load_category_files(
+    path: str, files: list[str], workers: int = 1
+) -> tuple[list[dict[str, Any]], dict[str, int]]:
+    """Load and normalize every category file, using up to `workers` processes.
+
+    Products are merged back in `files` order no matter which worker finishes
+    first and numbered in that order, which gives each its stable `id`.
+    Returns the products and the unparseable value counts per column.
+    """
+    loaded = {}
+    parse_failures = defaultdict(int)
+    product_count = 0
+    done = 0
+    async for file, outcome in _iter_loaded_files(
+        path, files, min(workers, len(files))
+    ):
+        done += 1
+        if isinstance(outcome, Exception):
+            logging.error(f"Skipped file {file}: {outcome}", exc_info=outcome)
+        else:
+            products, failures = outcome
+            loaded[file] = products
+            product_count += len(products)
+            for column, count in failures.items():
+                parse_failures[column] += count
+        if done % 5 == 0 or done == len(files):
+            logging.info(
+                f"Processed {done}/{len(files)} files ({product_count} products so far)."
+            )
+    all_products = [product for file in files for product in loaded.get(file, [])]
+    for product_id, product in enumerate(all_products):
+        product["id"] = product_id
+    return all_products, dict(parse_failures)
@@ -0,0 +1,75 @@
+import os
+import asyncio
+import logging
+import contextlib
+
+import kagglehub
+
+from app.data.cache import catalog_cache_key, read_catalog_cache, write_catalog_cache
+from app.data.catalog import Catalog, current_catalog, publish_catalog
+from app.data.ingest import ingest_workers, load_category_files
+
+DATASET_HANDLE = "oleksiimartusiuk/e-commerce-data-shein"
+
+_load_task: asyncio.Task | None = None
+
+
+async def _load_catalog() -> Catalog:
+    """Download, parse (or read from cache) and publish the catalog.
+
+    Every blocking step runs in a worker thread or process so the event loop
+    stays free for other sessions while this is in flight.
+    """
+    logging.info("Downloading dataset from Kagglehub...")
+    path = await asyncio.to_thread(kagglehub.dataset_download, DATASET_HANDLE)
+    files = sorted(f for f in os.listdir(path) if f.endswith(".csv"))
+    cache_key = catalog_cache_key(path, files)
+    all_products = await asyncio.to_thread(read_catalog_cache, cache_key)
+    if all_products is None:
+        workers = ingest_workers()
+        logging.info(
+            f"Found {len(files)} CSV files to process with {workers} worker(s)."
+        )
+        all_products, parse_failures = await load_category_files(path, files, workers)
+        if any(parse_failures.values()):
+            logging.warning(
+                f"Unparseable values defaulted to 0 per column: {parse_failures}"
+            )
+        if all_products:
+            try:
+                await asyncio.to_thread(write_catalog_cache, cache_key, all_products)
+            except Exception as e:
+                logging.exception(f"Failed to write catalog cache: {e}")
+    return await asyncio.to_thread(publish_catalog, cache_key, all_products)
+
+
+async def ensure_catalog() -> Catalog:
+    """The process-wide catalog, loading it on first use.
+
+    Concurrent callers from any session or page await the same in-flight
+    load. A failed load is not remembered, so the next caller retries.
+    """
+    global _load_task
+    catalog = current_catalog()
+    if catalog.products:
+        return catalog
+    if _load_task is None:
+        logging.info("Starting data load...")
+        _load_task = asyncio.create_task(_load_catalog())
+    task = _load_task
+    try:
+        return await asyncio.shield(task)
+    finally:
+        if task.done() and _load_task is task:
+            _load_task = None
+
+
+@contextlib.asynccontextmanager
+async def preload_catalog():
+    """Lifespan task that loads the catalog before the app serves requests."""
+    try:
+        catalog = await ensure_catalog()
+        logging.info(f"Preloaded catalog: {len(catalog.products)} products.")
+    except Exception as e:
+        logging.exception(f"Failed to preload catalog: {e}")
+    yield
@@ -0,0 +1,282 @@
+import re
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+NGRAM = 3
+TOKEN_PATTERN = r"\w+"
+BM25_K1 = 1.2
+BM25_B = 0.75
+MAX_TYPOS = 2
+
+
+def _code_points(text: str) -> np.ndarray:
+    """Unicode code points of `text` as uint64, ready to be packed into n-gram keys."""
+    data = text.encode("utf-32-le", errors="surrogatepass")
+    return np.frombuffer(data, dtype=np.uint32).astype(np.uint64)
+
+
+def _ngram_keys(codes: np.ndarray) -> np.ndarray:
+    """Pack each run of three code points (21 bits each) into one integer key."""
+    return (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+
+
+def _intersect_sorted(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Values present in both sorted, duplicate-free arrays; costs O(len(a) log len(b))."""
+    if not len(a) or not len(b):
+        return a[:0]
+    positions = np.searchsorted(b, a).clip(max=len(b) - 1)
+    return a[b[positions] == a]
+
+
+@dataclass(frozen=True, eq=False)
+class TrigramIndex:
+    """Inverted index from lowercase title trigrams to the rows containing them.
+
+    Postings are stored CSR-style: the rows for `keys[i]` are
+    `rows[offsets[i]:offsets[i + 1]]`, sorted ascending.
+    """
+
+    keys: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.uint64))
+    offsets: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    rows: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+
+    @classmethod
+    def build(cls, titles_lower: Sequence[str]) -> "TrigramIndex":
+        lengths = np.fromiter(
+            (len(t) for t in titles_lower), dtype=np.int64, count=len(titles_lower)
+        )
+        codes = _code_points("".join(titles_lower))
+        if len(codes) < NGRAM:
+            return cls()
+        row_of_char = np.repeat(np.arange(len(titles_lower), dtype=np.int32), lengths)
+        keys = _ngram_keys(codes)
+        # Drop trigrams that straddle two titles in the concatenated text.
+        within_title = row_of_char[:-2] == row_of_char[2:]
+        keys = keys[within_title]
+        rows = row_of_char[:-2][within_title]
+        # Rows already ascend along the text, so a stable sort by key keeps
+        # every posting list sorted.
+        order = np.argsort(keys, kind="stable")
+        keys = keys[order]
+        rows = rows[order]
+        distinct = np.ones(len(keys), dtype=bool)
+        distinct[1:] = (keys[1:] != keys[:-1]) | (rows[1:] != rows[:-1])
+        keys = keys[distinct]
+        rows = rows[distinct]
+        unique_keys, starts = np.unique(keys, return_index=True)
+        return cls(
+            keys=unique_keys,
+            offsets=np.append(starts, len(keys)).astype(np.int64),
+            rows=rows,
+        )
+
+    def candidates(self, query: str) -> np.ndarray | None:
+        """Sorted rows whose title contains every trigram of the lowercase `query`.
+
+        This is a superset of the rows containing `query` itself, exact for
+        three-character queries. Returns None for queries too short to index.
+        """
+        if len(query) < NGRAM:
+            return None
+        keys = np.unique(_ngram_keys(_code_points(query)))
+        positions = np.searchsorted(self.keys, keys)
+        if (positions >= len(self.keys)).any() or (self.keys[positions] != keys).any():
+            return self.rows[:0]
+        postings = sorted(
+            (self.rows[self.offsets[p] : self.offsets[p + 1]] for p in positions),
+            key=len,
+        )
+        result = postings[0]
+        for other in postings[1:]:
+            result = _intersect_sorted(result, other)
+        return result
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase word tokens of `text`."""
+    return re.findall(TOKEN_PATTERN, text.lower())
+
+
+def max_typos(term: str) -> int:
+    """Edits tolerated in a query term: none up to 3 letters, then 1, then 2 from 8."""
+    if len(term) <= 3:
+        return 0
+    return 1 if len(term) <= 7 else MAX_TYPOS
+
+
+def _indexed_deletions(term: str) -> int:
+    """Deletions to precompute for a vocabulary term so every query that may
+    match it within `max_typos` edits is found."""
+    if len(term) < 3:
+        return 0
+    return 1 if len(term) <= 5 else MAX_TYPOS
+
+
+def _deletions(term: str, edits: int) -> list[set[str]]:
+    """Strings reachable from `term` by deleting exactly 0, 1, ... `edits` characters."""
+    levels = [{term}]
+    for _ in range(edits):
+        levels.append({v[:i] + v[i + 1 :] for v in levels[-1] for i in range(len(v))})
+    return levels
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between `a` and `b`, or `limit + 1` once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+@dataclass(frozen=True, eq=False)
+class BM25Index:
+    """Term index over titles for ranked, typo-tolerant search.
+
+    Each posting carries its precomputed BM25 weight, so scoring a query is
+    one `np.bincount` over the postings of its matching terms. Typos are
+    handled symmetric-delete style: `deletions[k]` maps the strings obtained
+    by deleting `k` characters from vocabulary terms back to those terms.
+    """
+
+    row_count: int = 0
+    vocabulary: tuple[str, ...] = ()
+    term_ids: dict[str, int] = field(default_factory=dict)
+    offsets: np.ndarray = field(default_factory=lambda: np.zeros(1, dtype=np.int64))
+    rows: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int32))
+    weights: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    deletions: tuple[dict[str, list[int]], ...] = ()
+
+    @classmethod
+    def build(cls, titles_lower: Sequence[str]) -> "BM25Index":
+        row_count = len(titles_lower)
+        tokens = pd.Series(titles_lower, dtype=object).str.findall(TOKEN_PATTERN)
+        tokens = tokens.explode().dropna()
+        if tokens.empty:
+            return cls(row_count=row_count)
+        token_rows = tokens.index.to_numpy(dtype=np.int64)
+        token_terms, vocabulary = pd.factorize(tokens.to_numpy(dtype=object), sort=True)
+        pairs, tf = np.unique(
+            token_terms.astype(np.int64) * row_count + token_rows, return_counts=True
+        )
+        terms = pairs // row_count
+        rows = (pairs % row_count).astype(np.int32)
+        doc_freq = np.bincount(terms, minlength=len(vocabulary))
+        doc_len = np.bincount(token_rows, minlength=row_count)
+        idf = np.log1p((row_count - doc_freq + 0.5) / (doc_freq + 0.5))
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len[rows] / doc_len.mean())
+        weights = idf[terms] * tf * (BM25_K1 + 1) / (tf + norm)
+        vocabulary = tuple(vocabulary.tolist())
+        deletions = tuple({} for _ in range(MAX_TYPOS + 1))
+        for term_id, term in enumerate(vocabulary):
+            for level, variants in enumerate(
+                _deletions(term, _indexed_deletions(term))
+            ):
+                for variant in variants:
+                    deletions[level].setdefault(variant, []).append(term_id)
+        return cls(
+            row_count=row_count,
+            vocabulary=vocabulary,
+            term_ids={term: term_id for term_id, term in enumerate(vocabulary)},
+            offsets=np.concatenate(([0], np.cumsum(doc_freq))).astype(np.int64),
+            rows=rows,
+            weights=weights,
+            deletions=deletions,
+        )
+
+    def matching_terms(self, token: str) -> dict[int, int]:
+        """Vocabulary term ids within `max_typos(token)` edits, with their distance."""
+        typos = max_typos(token)
+        if not typos:
+            term_id = self.term_ids.get(token)
+            return {} if term_id is None else {term_id: 0}
+        matches = {}
+        for variants in _deletions(token, typos):
+            for variant in variants:
+                for deleted in self.deletions[: typos + 1]:
+                    for term_id in deleted.get(variant, ()):
+                        if term_id not in matches:
+                            term = self.vocabulary[term_id]
+                            matches[term_id] = edit_distance(token, term, typos)
+        return {t: d for t, d in matches.items() if d <= typos}
+
+    def search(self, query: str) -> tuple[np.ndarray, np.ndarray]:
+        """Rows matching any query term, allowing typos, and their BM25 scores.
+
+        Rows come back in ascending order. A fuzzy match contributes its
+        term's weight divided by one plus its edit distance.
+        """
+        rows, weights = [], []
+        for token in set(tokenize(query)):
+            for term_id, distance in self.matching_terms(token).items():
+                start, end = self.offsets[term_id], self.offsets[term_id + 1]
+                rows.append(self.rows[start:end])
+                weight = self.weights[start:end]
+                weights.append(weight / (1 + distance) if distance else weight)
+        if not rows:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        rows = np.concatenate(rows)
+        weights = np.concatenate(weights)
+        if len(rows) * 8 < self.row_count:
+            # Few postings: sum per distinct row instead of over every row.
+            hits, inverse = np.unique(rows, return_inverse=True)
+            return hits, np.bincount(inverse, weights)
+        scores = np.bincount(rows, weights, minlength=self.row_count)
+        hits = np.flatnonzero(scores)
+        return hits, scores[hits]
+
+
+@dataclass(frozen=True, eq=False)
+class PrefixIndex:
+    """Autocomplete entries sorted by lowercase key, with their frequencies.
+
+    The completions of a prefix form one contiguous slice of `keys`, found
+    by binary search; only that slice is ranked.
+    """
+
+    keys: tuple[str, ...] = ()
+    labels: tuple[str, ...] = ()
+    kinds: tuple[str, ...] = ()
+    counts: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+
+    @classmethod
+    def build(cls, entries: Iterable[tuple[str, str, int]]) -> "PrefixIndex":
+        """Index `(label, kind, count)` entries."""
+        entries = sorted(entries, key=lambda e: (e[0].lower(), e[1]))
+        return cls(
+            keys=tuple(label.lower() for label, _, _ in entries),
+            labels=tuple(label for label, _, _ in entries),
+            kinds=tuple(kind for _, kind, _ in entries),
+            counts=np.array([count for _, _, count in entries], dtype=np.int64),
+        )
+
+    def complete(self, prefix: str, limit: int) -> list[tuple[str, str, int]]:
+        """The `limit` most frequent `(label, kind, count)` entries starting with `prefix`.
+
+        Equally frequent entries keep their alphabetical order.
+        """
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + "\U0010ffff", lo=start)
+        counts = -self.counts[start:end]
+        if len(counts) > limit:
+            top = np.argpartition(counts, limit - 1)[:limit]
+            top = top[np.lexsort((top, counts[top]))]
+        else:
+            top = np.argsort(counts, kind="stable")
+        return [
+            (self.labels[i], self.kinds[i], int(self.counts[i]))
+            for i in (top + start).tolist()
+        ]
@@ -0,0 +1,317 @@
+from dataclasses import dataclass, field
+from typing import Sequence
+
+import numpy as np
+
+from app.data.search import (
+    NGRAM,
+    BM25Index,
+    PrefixIndex,
+    TrigramIndex,
+    _intersect_sorted,
+)
+
+
+# (column, descending) orderings precomputed for every catalog.
+ORDERINGS = (
+    ("numeric_price", False),
+    ("numeric_price", True),
+    ("discount_value", True),
+    ("titles", False),
+    ("color_count", True),
+)
+
+
+# A price range matching fewer than 1/PRICE_ROWS_RATIO of the rows is read off
+# the sorted prices as a candidate list instead of being compared row by row.
+PRICE_ROWS_RATIO = 8
+
+
+def _empty(dtype) -> np.ndarray:
+    return np.empty(0, dtype=dtype)
+
+
+def _category_bitmaps(codes: np.ndarray, count: int) -> np.ndarray:
+    """One packed bitmap of member rows per category code, as rows of a matrix."""
+    bitmaps = np.zeros((count, (len(codes) + 7) // 8), dtype=np.uint8)
+    for code in range(count):
+        bitmaps[code] = np.packbits(codes == code)
+    return bitmaps
+
+
+@dataclass(frozen=True, eq=False)
+class ProductTable:
+    """The catalog as NumPy columns, one row per product in catalog order.
+
+    Filters are evaluated as boolean masks over these columns and return
+    arrays of row indices rather than lists of product dicts.
+    """
+
+    categories: tuple[str, ...] = ()
+    ids: np.ndarray = field(default_factory=lambda: _empty(np.int64))
+    id_rows: np.ndarray = field(default_factory=lambda: _empty(np.int64))
+    category_codes: np.ndarray = field(default_factory=lambda: _empty(np.int32))
+    numeric_price: np.ndarray = field(default_factory=lambda: _empty(np.float64))
+    discount_value: np.ndarray = field(default_factory=lambda: _empty(np.float64))
+    color_count: np.ndarray = field(default_factory=lambda: _empty(np.int64))
+    titles: np.ndarray = field(default_factory=lambda: _empty(object))
+    titles_lower: tuple[str, ...] = ()
+    title_index: TrigramIndex = field(default_factory=TrigramIndex)
+    term_index: BM25Index = field(default_factory=BM25Index)
+    completions: PrefixIndex = field(default_factory=PrefixIndex)
+    orders: dict[tuple[str, bool], np.ndarray] = field(default_factory=dict)
+    sorted_prices: np.ndarray = field(default_factory=lambda: _empty(np.float64))
+    category_bitmaps: np.ndarray = field(
+        default_factory=lambda: np.empty((0, 0), dtype=np.uint8)
+    )
+    discount_bitmap: np.ndarray = field(default_factory=lambda: _empty(np.uint8))
+
+    @classmethod
+    def from_products(cls, products: Sequence[dict]) -> "ProductTable":
+        categories = tuple(sorted({p["category"] for p in products}))
+        codes = {category: code for code, category in enumerate(categories)}
+        titles = [p["title"] for p in products]
+        titles_lower = tuple(title.lower() for title in titles)
+        category_codes = np.fromiter(
+            (codes[p["category"]] for p in products),
+            dtype=np.int32,
+            count=len(products),
+        )
+        ids = np.fromiter(
+            (p["id"] for p in products), dtype=np.int64, count=len(products)
+        )
+        # Ids are dense, so the row of every id is one array lookup away.
+        id_rows = np.full(int(ids.max()) + 1 if len(ids) else 0, -1, dtype=np.int64)
+        id_rows[ids] = np.arange(len(ids))
+        term_index = BM25Index.build(titles_lower)
+        term_counts = np.diff(term_index.offsets).tolist()
+        category_counts = np.bincount(category_codes, minlength=len(categories))
+        completions = PrefixIndex.build(
+            [(t, "term", n) for t, n in zip(term_index.vocabulary, term_counts)]
+            + [(c, "category", n) for c, n in zip(categories, category_counts.tolist())]
+        )
+        columns = {
+            "numeric_price": np.fromiter(
+                (p["numeric_price"] for p in products),
+                dtype=np.float64,
+                count=len(products),
+            ),
+            "discount_value": np.fromiter(
+                (p["discount_value"] for p in products),
+                dtype=np.float64,
+                count=len(products),
+            ),
+            "color_count": np.fromiter(
+                (p["color_count"] for p in products),
+                dtype=np.int64,
+                count=len(products),
+            ),
+            "titles": np.array(titles, dtype=object),
+        }
+        orders = {
+            (column, descending): np.argsort(
+                -columns[column] if descending else columns[column], kind="stable"
+            )
+            for column, descending in ORDERINGS
+        }
+        return cls(
+            categories=categories,
+            ids=ids,
+            id_rows=id_rows,
+            category_codes=category_codes,
+            **columns,
+            titles_lower=titles_lower,
+            title_index=TrigramIndex.build(titles_lower),
+            term_index=term_index,
+            completions=completions,
+            orders=orders,
+            sorted_prices=columns["numeric_price"][orders["numeric_price", False]],
+            category_bitmaps=_category_bitmaps(category_codes, len(categories)),
+            discount_bitmap=np.packbits(columns["discount_value"] > 0),
+        )
+
+    def __len__(self) -> int:
+        return len(self.numeric_price)
+
+    def row_of(self, product_id: int) -> int | None:
+        """The row of the product with id `product_id`, or None if there is none."""
+        if not 0 <= product_id < len(self.id_rows):
+            return None
+        row = int(self.id_rows[product_id])
+        return row if row >= 0 else None
+
+    def category_selection(self, names: Sequence[str]) -> np.ndarray:
+        """Boolean mask over `categories` of those in `names`."""
+        return np.fromiter(
+            (name in names for name in self.categories),
+            dtype=bool,
+            count=len(self.categories),
+        )
+
+    def category_bits(self, names: Sequence[str]) -> np.ndarray:
+        """Packed bitmap of the rows whose category is any of `names`."""
+        selected = np.flatnonzero(self.category_selection(names))
+        if not len(selected):
+            return np.zeros_like(self.discount_bitmap)
+        return np.bitwise_or.reduce(self.category_bitmaps[selected], axis=0)
+
+    def category_mask(self, names: Sequence[str]) -> np.ndarray:
+        """Rows whose category is any of `names`."""
+        return np.unpackbits(self.category_bits(names), count=len(self)).view(bool)
+
+    def price_span(self, low: float, high: float) -> tuple[int, int]:
+        """Bounds of the rows priced in `[low, high]` within the ascending price order.
+
+        Two binary searches over `sorted_prices`; the rows themselves are
+        `orders["numeric_price", False][start:end]`.
+        """
+        start = int(np.searchsorted(self.sorted_prices, low, side="left"))
+        end = int(np.searchsorted(self.sorted_prices, high, side="right"))
+        return start, max(start, end)
+
+    def select(
+        self,
+        search: str = "",
+        categories: Sequence[str] = (),
+        price_range: Sequence[float] | None = None,
+        discounts_only: bool = False,
+        within: np.ndarray | None = None,
+    ) -> np.ndarray:
+        """Indices, in catalog order, of the rows matching every given filter.
+
+        The column predicates are combined into one mask. A price range is
+        first sized by binary search on the sorted prices: a narrow one yields
+        its candidate rows directly, a wide one is compared into the mask. A
+        title search starts from the trigram index candidates when the query
+        is long enough, and from the masked rows otherwise, and confirms each
+        remaining row with the same substring test as before. `within`, a
+        sorted array of rows, restricts the result to those rows.
+        """
+        masks = []
+        price_rows = None
+        # Category and discount predicates are combined on packed bitmaps
+        # and unpacked once into the mask.
+        bits = self.category_bits(categories) if categories else None
+        if discounts_only:
+            bits = self.discount_bitmap if bits is None else bits & self.discount_bitmap
+        if bits is not None:
+            masks.append(np.unpackbits(bits, count=len(self)).view(bool))
+        if price_range is not None:
+            low, high = price_range
+            start, end = self.price_span(low, high)
+            if (end - start) * PRICE_ROWS_RATIO < len(self):
+                price_rows = np.sort(self.orders["numeric_price", False][start:end])
+            else:
+                masks.append(self.numeric_price >= low)
+                masks.append(self.numeric_price <= high)
+        mask = None
+        if masks:
+            mask = masks[0]
+            for other in masks[1:]:
+                mask &= other
+        query = search.lower()
+        candidates = self.title_index.candidates(query) if query else None
+        for rows in (within, price_rows):
+            if rows is None:
+                continue
+            if candidates is None:
+                candidates = rows
+            elif len(rows) < len(candidates):
+                candidates = _intersect_sorted(rows, candidates)
+            else:
+                candidates = _intersect_sorted(candidates, rows)
+        if candidates is not None:
+            indices = candidates if mask is None else candidates[mask[candidates]]
+            if not query or len(query) == NGRAM:
+                return indices
+        elif mask is not None:
+            indices = np.flatnonzero(mask)
+        elif query:
+            titles = self.titles_lower
+            return np.flatnonzero(
+                np.fromiter((query in t for t in titles), dtype=bool, count=len(titles))
+            )
+        else:
+            return np.arange(len(self))
+        if query:
+            titles = self.titles_lower
+            matches = np.fromiter(
+                (query in titles[i] for i in indices.tolist()),
+                dtype=bool,
+                count=len(indices),
+            )
+            indices = indices[matches]
+        return indices
+
+    def ordered_slice(
+        self,
+        ordering: tuple[str, bool],
+        indices: np.ndarray,
+        member: np.ndarray,
+        start: int,
+        stop: int,
+    ) -> np.ndarray:
+        """Rows `start:stop` of `indices` sorted by `ordering`, one of `ORDERINGS`.
+
+        `member` is the boolean mask of `indices`. For a dense selection the
+        precomputed permutation is walked in growing chunks until `stop`
+        members are found, so a page costs about `stop * len(self) / len(indices)`
+        rather than a sort; a sparse selection is cheaper to sort directly.
+        Either way ties keep catalog order, as with a stable sort.
+        """
+        count = len(indices)
+        stop = min(stop, count)
+        if start >= stop:
+            return indices[:0]
+        order = self.orders[ordering]
+        if count == len(self):
+            return order[start:stop]
+        if count * count < stop * len(self):
+            column, descending = ordering
+            keys = getattr(self, column)[indices]
+            keys = -keys if descending else keys
+            return indices[np.argsort(keys, kind="stable")[start:stop]]
+        found = []
+        total = 0
+        position = 0
+        chunk = stop * len(self) // count + 1024
+        while total < stop and position < len(order):
+            block = order[position : position + chunk]
+            block = block[member[block]]
+            found.append(block)
+            total += len(block)
+            position += chunk
+            chunk *= 2
+        return np.concatenate(found)[start:stop]
+
+    def top_k(
+        self,
+        column: str,
+        k: int,
+        indices: np.ndarray | None = None,
+        descending: bool = True,
+        category: str | None = None,
+    ) -> np.ndarray:
+        """Rows of the `k` largest (or smallest) values of a numeric `column`, best first.
+
+        Candidates are `indices` (ascending, all rows if None), optionally
+        restricted to one `category`. Selection is a linear-time partition
+        rather than a sort, and ties keep catalog order as a stable sort would.
+        """
+        if indices is None:
+            indices = np.arange(len(self))
+        if category is not None:
+            if category not in self.categories:
+                return indices[:0]
+            code = self.categories.index(category)
+            indices = indices[self.category_codes[indices] == code]
+        keys = getattr(self, column)[indices]
+        keys = -keys if descending else keys
+        if len(keys) > k:
+            threshold = np.partition(keys, k - 1)[k - 1]
+            better = np.flatnonzero(keys < threshold)
+            ties = np.flatnonzero(keys == threshold)[: k - len(better)]
+            chosen = np.sort(np.concatenate((better, ties)))
+            indices = indices[chosen]
+            keys = keys[chosen]
+        return indices[np.argsort(keys, kind="stable")]
@@ -0,0 +1,217 @@
+import os
+import asyncio
+import logging
+import sqlite3
+import threading
+import contextlib
+from collections import OrderedDict
+
+WISHLIST = "wishlist"
+COMPARE = "compare"
+FLUSH_SECONDS = 2.0
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS user_list_items (
+    user_id TEXT NOT NULL,
+    list_name TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, list_name, product_id)
+) WITHOUT ROWID
+"""
+
+ListKey = tuple[str, str]
+
+
+class UserListStore:
+    """Per-user lists of product ids, such as wishlists, persisted in SQLite.
+
+    Reads are served from an LRU of recently used lists; a miss costs one
+    query on the primary key. Changes apply to cached lists at once and are
+    written to the database in batches, one transaction per `flush`, which
+    the `flush_user_lists` task runs periodically and as soon as
+    `batch_size` changes are pending. Reads that miss the cache and flushes
+    block on SQLite, so async code calls them through `asyncio.to_thread`.
+
+    The cache belongs to one process. With several workers, changes made by
+    another worker are seen once it has flushed them and the list is read
+    with `refresh=True`, as every page load does.
+    """
+
+    def __init__(self, path: str, max_cached_lists: int, batch_size: int = 500):
+        self.path = path
+        # `toggle` works on a cached list, so at least one is kept.
+        self.max_cached_lists = max(1, max_cached_lists)
+        self.batch_size = batch_size
+        self._lists: OrderedDict[ListKey, set[int]] = OrderedDict()
+        # Latest change per item: True to add it, False to remove it.
+        self._pending: dict[tuple[str, str, int], bool] = {}
+        self._lock = threading.Lock()
+        # Held from taking a batch until it is committed, and while reading
+        # a list that is not cached, so reads never miss a change in flight.
+        self._db_lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._batch_full = threading.Event()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(SCHEMA)
+            self._connection = connection
+        return self._connection
+
+    def get(
+        self, user_id: str, list_name: str, refresh: bool = False
+    ) -> frozenset[int]:
+        """The product ids in one user's list, read from the database rather
+        than the cache if `refresh` is set."""
+        key = (user_id, list_name)
+        with self._lock:
+            items = None if refresh else self._lists.get(key)
+            if items is not None:
+                self._lists.move_to_end(key)
+                return frozenset(items)
+        with self._db_lock:
+            rows = self._db().execute(
+                "SELECT product_id FROM user_list_items"
+                " WHERE user_id = ? AND list_name = ?",
+                key,
+            )
+            items = {product_id for (product_id,) in rows}
+            with self._lock:
+                for (user, name, product_id), present in self._pending.items():
+                    if (user, name) == key:
+                        if present:
+                            items.add(product_id)
+                        else:
+                            items.discard(product_id)
+                self._lists[key] = items
+                self._lists.move_to_end(key)
+                while len(self._lists) > self.max_cached_lists:
+                    self._lists.popitem(last=False)
+        return frozenset(items)
+
+    def _record(self, key: ListKey, product_id: int, present: bool):
+        """Apply a change to the cached list and queue it; `_lock` must be held."""
+        items = self._lists.get(key)
+        if items is not None:
+            if present:
+                items.add(product_id)
+            else:
+                items.discard(product_id)
+        self._pending[(*key, product_id)] = present
+        if len(self._pending) >= self.batch_size:
+            self.wake_flusher()
+
+    def _change(self, user_id: str, list_name: str, product_id: int, present: bool):
+        with self._lock:
+            self._record((user_id, list_name), product_id, present)
+
+    def add(self, user_id: str, list_name: str, product_id: int):
+        self._change(user_id, list_name, product_id, True)
+
+    def remove(self, user_id: str, list_name: str, product_id: int):
+        self._change(user_id, list_name, product_id, False)
+
+    def toggle(
+        self,
+        user_id: str,
+        list_name: str,
+        product_id: int,
+        max_items: int | None = None,
+    ) -> frozenset[int]:
+        """Remove `product_id` from the list if it is there, else add it unless
+        the list already holds `max_items`. Returns the list after the change.
+
+        The check and the change happen under one hold of the lock, so
+        concurrent toggles never take a list past `max_items`.
+        """
+        key = (user_id, list_name)
+        while True:
+            self.get(user_id, list_name)
+            with self._lock:
+                items = self._lists.get(key)
+                if items is None:
+                    # Evicted since it was loaded; load it again.
+                    continue
+                if product_id in items:
+                    self._record(key, product_id, False)
+                elif max_items is None or len(items) < max_items:
+                    self._record(key, product_id, True)
+                return frozenset(items)
+
+    def remove_all(self, user_id: str, list_name: str):
+        for product_id in self.get(user_id, list_name):
+            self.remove(user_id, list_name, product_id)
+
+    def wait_for_batch(self, timeout: float) -> bool:
+        """Block until `batch_size` changes are pending, `wake_flusher` is
+        called, or `timeout` seconds pass; False in the last case."""
+        return self._batch_full.wait(timeout)
+
+    def wake_flusher(self):
+        """Make a pending or the next `wait_for_batch` return at once."""
+        self._batch_full.set()
+
+    def flush(self):
+        """Write every pending change to the database in one transaction.
+
+        If the write fails, the changes stay pending and the error is raised.
+        """
+        with self._db_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                self._batch_full.clear()
+            if not batch:
+                return
+            try:
+                with self._db() as connection:
+                    connection.executemany(
+                        "INSERT OR IGNORE INTO user_list_items VALUES (?, ?, ?)",
+                        [item for item, present in batch.items() if present],
+                    )
+                    connection.executemany(
+                        "DELETE FROM user_list_items"
+                        " WHERE user_id = ? AND list_name = ? AND product_id = ?",
+                        [item for item, present in batch.items() if not present],
+                    )
+            except Exception:
+                # Keep the batch for the next flush, behind any newer change
+                # to the same items.
+                with self._lock:
+                    for item, present in batch.items():
+                        self._pending.setdefault(item, present)
+                raise
+
+    def clear_cache(self):
+        with self._lock:
+            self._lists.clear()
+
+
+user_lists = UserListStore(
+    path=os.getenv("USER_LISTS_DB", ".user_lists.sqlite3"),
+    max_cached_lists=int(os.getenv("USER_LISTS_CACHE_ENTRIES", "10000")),
+)
+
+
+@contextlib.asynccontextmanager
+async def flush_user_lists():
+    """Lifespan task that writes pending list changes every `FLUSH_SECONDS`,
+    or sooner when a batch fills up, and once more on shutdown."""
+
+    async def flush_periodically():
+        while True:
+            await asyncio.to_thread(user_lists.wait_for_batch, FLUSH_SECONDS)
+            try:
+                await asyncio.to_thread(user_lists.flush)
+            except Exception as e:
+                logging.exception(f"Failed to save user lists: {e}")
+
+    task = asyncio.create_task(flush_periodically())
+    try:
+        yield
+    finally:
+        task.cancel()
+        await asyncio.to_thread(user_lists.flush)
+        # Release the flusher's thread if it is still waiting for a batch.
+        user_lists.wake_flusher()
@@ -4,6 +4,8 @@ from app.components.kpi import kpi_grid, loading_skeleton
 from app.components.charts import (
     charts_grid,
     top_products_table,
+    top_discounted_table,
+    most_colors_table,
     charts_loading_skeleton,
 )
 from app.components.filters import filters_section
@@ -27,6 +29,11 @@ def dashboard_page() -> rx.Component:
                         kpi_grid(),
                         charts_grid(),
                         top_products_table(),
+                        rx.el.div(
+                            top_discounted_table(),
+                            most_colors_table(),
+                            class_name="grid md:grid-cols-2 gap-6",
+                        ),
                         class_name="space-y-6 flex-1",
                     ),
                     analysis_panel(),
@@ -6,7 +6,21 @@ from app.components.product_grid import (
     product_view_controls,
     pagination_controls,
 )
-from app.states.product_state import ProductState
+from app.states.product_state import FacetCount, ProductState
+
+
+def facet_counts(facets: rx.Var[list[FacetCount]]) -> rx.Component:
+    return rx.el.ul(
+        rx.foreach(
+            facets,
+            lambda facet: rx.el.li(
+                rx.el.span(facet["label"]),
+                rx.el.span(facet["count"], class_name="text-gray-500"),
+                class_name="flex justify-between",
+            ),
+        ),
+        class_name="mt-2 space-y-1 text-sm text-gray-700",
+    )
 
 
 def filter_sidebar() -> rx.Component:
@@ -43,6 +57,7 @@ def filter_sidebar() -> rx.Component:
                 rx.el.p(
                     f"${ProductState.price_range[0].to_string()} - ${ProductState.price_range[1].to_string()}"
                 ),
+                facet_counts(ProductState.price_facets),
                 class_name="py-4 border-b",
             ),
             rx.el.div(
@@ -59,6 +74,7 @@ def filter_sidebar() -> rx.Component:
                     ),
                     class_name="flex items-center",
                 ),
+                facet_counts(ProductState.discount_facets),
                 class_name="py-4",
             ),
             rx.el.button(
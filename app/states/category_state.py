@@ -1,8 +1,10 @@
 import reflex as rx
-from app.states.dashboard_state import DashboardState, Product
+from app.states.dashboard_state import Product
+from app.data.aggregates import category_stats
+from app.data.catalog import get_catalog
+from app.data.loader import ensure_catalog
 from typing import TypedDict, Any
 import asyncio
-from collections import defaultdict
 import statistics
 import json
 import os
@@ -20,72 +22,30 @@ class CategoryHealth(TypedDict):
 
 
 class CategoryState(rx.State):
-    products: list[Product] = []
+    catalog_version: str = ""
     selected_category: str | None = None
     ai_insights: dict[str, str] = {}
     is_loading_insights: bool = False
 
-    @rx.event
+    @rx.event(background=True)
     async def on_load(self):
-        dashboard_state = await self.get_state(DashboardState)
-        if not dashboard_state.products:
-            pass
-        self.products = dashboard_state.products
+        try:
+            catalog = await ensure_catalog()
+        except Exception as e:
+            logging.exception(f"Failed to load data: {e}")
+            return
+        async with self:
+            self.catalog_version = catalog.version
 
     @rx.var
     def all_categories(self) -> list[str]:
         """All unique categories from the full product list."""
-        if not self.products:
-            return []
-        return sorted(list(set((p["category"] for p in self.products))))
+        return list(get_catalog(self.catalog_version).categories)
 
     @rx.var
     def category_stats(self) -> list[dict[str, str | float | int]]:
-        if not self.products:
-            return []
-        category_data = defaultdict(
-            lambda: {
-                "price_sum": 0,
-                "price_count": 0,
-                "discount_sum": 0,
-                "discount_count": 0,
-                "product_count": 0,
-                "color_sum": 0,
-                "color_count": 0,
-            }
-        )
-        for p in self.products:
-            cat = p["category"]
-            category_data[cat]["product_count"] += 1
-            if p["numeric_price"] > 0:
-                category_data[cat]["price_sum"] += p["numeric_price"]
-                category_data[cat]["price_count"] += 1
-            if p["discount_value"] > 0:
-                category_data[cat]["discount_sum"] += p["discount_value"]
-                category_data[cat]["discount_count"] += 1
-            if p["color_count"] > 0:
-                category_data[cat]["color_sum"] += p["color_count"]
-                category_data[cat]["color_count"] += 1
-        stats = []
-        for category, data in category_data.items():
-            stats.append(
-                {
-                    "name": category,
-                    "avg_price": round(data["price_sum"] / data["price_count"], 2)
-                    if data["price_count"] > 0
-                    else 0,
-                    "avg_discount": round(
-                        data["discount_sum"] / data["discount_count"], 2
-                    )
-                    if data["discount_count"] > 0
-                    else 0,
-                    "product_count": data["product_count"],
-                    "avg_colors": round(data["color_sum"] / data["color_count"], 1)
-                    if data["color_count"] > 0
-                    else 0,
-                }
-            )
-        return stats
+        partials = get_catalog(self.catalog_version).partials
+        return category_stats(partials.category_groups(None, False))
 
     @rx.var
     def category_health_scores(self) -> list[CategoryHealth]:
@@ -146,11 +106,10 @@ class CategoryState(rx.State):
     def selected_category_products(self) -> list[Product]:
         if not self.selected_category:
             return []
-        return sorted(
-            [p for p in self.products if p["category"] == self.selected_category],
-            key=lambda p: p["numeric_price"],
-            reverse=True,
-        )[:10]
+        catalog = get_catalog(self.catalog_version)
+        return catalog.rows(
+            catalog.table.top_k("numeric_price", 10, category=self.selected_category)
+        )
 
     @rx.event
     def select_category(self, category_name: str):
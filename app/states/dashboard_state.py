@@ -1,304 +1,176 @@
 import reflex as rx
-import pandas as pd
-import kagglehub
-import os
-import asyncio
+import numpy as np
 import logging
-from typing import TypedDict, Any
-from collections import defaultdict
-
-
-class Product(TypedDict):
-    category: str
-    title: str
-    price_str: str
-    numeric_price: float
-    discount_str: str | None
-    discount_value: float
-    color_count: int
-    selling_proposition: str | None
-
-
-class DashboardState(rx.State):
-    products: list[Product] = []
+from app.data.aggregates import (
+    Kpis,
+    category_stats,
+    compute_kpis,
+    group_by_category,
+)
+from app.data.catalog import Product, get_catalog
+from app.data.filter_cache import FilterResult, select_cached
+from app.data.loader import ensure_catalog
+from app.states.filters import CatalogFilterState
+
+
+class DashboardState(CatalogFilterState, rx.State):
+    catalog_version: str = ""
     is_loading: bool = True
     search_query: str = ""
+    _previous_search: str = ""
     selected_categories: list[str] = []
     price_range: list[float] = [0, 500]
     show_discounts_only: bool = False
+    _transient_vars = ("_filter_result", "_filtered_indices", "_kpis")
 
     @rx.event(background=True)
     async def load_data(self):
         async with self:
-            if self.products:
-                logging.info(f"Data already loaded: {len(self.products)} products.")
+            catalog = get_catalog(self.catalog_version)
+            if catalog.products:
+                logging.info(f"Data already loaded: {len(catalog.products)} products.")
                 self.is_loading = False
                 return
             self.is_loading = True
-            logging.info("Starting data load...")
         try:
-            logging.info("Downloading dataset from Kagglehub...")
-            path = kagglehub.dataset_download("oleksiimartusiuk/e-commerce-data-shein")
-            files = [f for f in os.listdir(path) if f.endswith(".csv")]
-            logging.info(f"Found {len(files)} CSV files to process.")
-            all_products = []
-            for i, file in enumerate(files, 1):
-                try:
-                    category_name = (
-                        file.replace("us-shein-", "")
-                        .replace(".csv", "")
-                        .replace("_", " ")
-                        .title()
-                    )
-                    df = pd.read_csv(os.path.join(path, file))
-                    if "goods-title-link--jump" in df.columns:
-                        df.rename(
-                            columns={
-                                "goods-title-link--jump": "title",
-                                "goods-title-link": "title_alt",
-                            },
-                            inplace=True,
-                        )
-                        df["title"] = df["title"].fillna(df["title_alt"])
-                    elif "goods-title-link" in df.columns:
-                        df.rename(columns={"goods-title-link": "title"}, inplace=True)
-                    else:
-                        logging.warning(
-                            f"Skipping file {file} due to missing title column."
-                        )
-                        continue
-                    df = df.dropna(subset=["title", "price"])
-                    for _, row in df.iterrows():
-                        price_str = str(row.get("price", "0"))
-                        numeric_price = 0.0
-                        if isinstance(price_str, str):
-                            price_cleaned = (
-                                price_str.replace("$", "").replace(",", "").strip()
-                            )
-                            if "-" in price_cleaned:
-                                parts = price_cleaned.split("-")
-                                try:
-                                    numeric_price = (
-                                        float(parts[0].strip())
-                                        + float(parts[1].strip())
-                                    ) / 2
-                                except (ValueError, IndexError) as e:
-                                    logging.exception(
-                                        f"Error parsing price range: {price_cleaned}, {e}"
-                                    )
-                                    numeric_price = 0.0
-                            else:
-                                try:
-                                    numeric_price = float(price_cleaned)
-                                except ValueError as e:
-                                    logging.exception(
-                                        f"Error parsing price: {price_cleaned}, {e}"
-                                    )
-                                    numeric_price = 0.0
-                        discount_str = row.get("discount")
-                        discount_value = 0.0
-                        if pd.notna(discount_str) and isinstance(discount_str, str):
-                            try:
-                                discount_value = float(
-                                    discount_str.replace("%", "").replace("-", "")
-                                )
-                            except ValueError as e:
-                                logging.exception(
-                                    f"Error parsing discount: {discount_str}, {e}"
-                                )
-                                discount_value = 0.0
-                        color_count_raw = row.get("color-count")
-                        color_count = (
-                            int(color_count_raw)
-                            if pd.notna(color_count_raw)
-                            and str(color_count_raw).isdigit()
-                            else 0
-                        )
-                        all_products.append(
-                            {
-                                "category": category_name,
-                                "title": str(row.get("title", "No Title")),
-                                "price_str": price_str,
-                                "numeric_price": round(numeric_price, 2),
-                                "discount_str": str(discount_str)
-                                if pd.notna(discount_str)
-                                else None,
-                                "discount_value": discount_value,
-                                "color_count": color_count,
-                                "selling_proposition": str(
-                                    row.get("selling_proposition")
-                                )
-                                if pd.notna(row.get("selling_proposition"))
-                                else None,
-                            }
-                        )
-                    if i % 5 == 0 or i == len(files):
-                        logging.info(
-                            f"Processed {i}/{len(files)} files ({len(all_products)} products so far)."
-                        )
-                except Exception as e:
-                    logging.exception(f"Skipped file {file}: {e}")
+            catalog = await ensure_catalog()
             async with self:
-                self.products = all_products
-                logging.info(f"Data loaded successfully: {len(all_products)} products.")
-                if all_products:
-                    max_price = max(
-                        (p["numeric_price"] for p in all_products), default=0
-                    )
-                    self.price_range = [0, max_price]
+                self.catalog_version = catalog.version
+                logging.info(
+                    f"Data loaded successfully: {len(catalog.products)} products."
+                )
+                if catalog.products:
+                    self.price_range = [0, catalog.max_price]
         except Exception as e:
             logging.exception(f"Failed to load data: {e}")
             async with self:
-                self.products = []
+                self.catalog_version = ""
         finally:
             async with self:
                 self.is_loading = False
                 logging.info(
-                    f"Loading complete. is_loading = {self.is_loading}, products = {len(self.products)}."
+                    f"Loading complete. is_loading = {self.is_loading}, products = {len(get_catalog(self.catalog_version).products)}."
                 )
 
+    @rx.var
+    def _kpis(self) -> Kpis:
+        """All KPIs for the filtered products, computed together in one pass."""
+        table = get_catalog(self.catalog_version).table
+        return self._filter_result.derived(
+            "kpis", lambda: compute_kpis(table, self._filtered_indices)
+        )
+
     @rx.var
     def total_products(self) -> int:
-        return len(self.filtered_products)
+        return self._kpis.total_products
 
     @rx.var
     def average_price(self) -> float:
-        if not self.filtered_products:
-            return 0.0
-        total = sum(
-            (
-                p["numeric_price"]
-                for p in self.filtered_products
-                if p["numeric_price"] > 0
-            )
-        )
-        count = sum((1 for p in self.filtered_products if p["numeric_price"] > 0))
-        return round(total / count, 2) if count > 0 else 0.0
+        return self._kpis.average_price
 
     @rx.var
     def total_categories(self) -> int:
-        if not self.filtered_products:
-            return 0
-        return len(set((p["category"] for p in self.filtered_products)))
+        return self._kpis.total_categories
 
     @rx.var
     def average_discount(self) -> float:
-        if not self.filtered_products:
-            return 0.0
-        discounted_products = [
-            p for p in self.filtered_products if p["discount_value"] > 0
-        ]
-        if not discounted_products:
-            return 0.0
-        return round(
-            sum((p["discount_value"] for p in discounted_products))
-            / len(discounted_products),
-            2,
-        )
+        return self._kpis.average_discount
 
     @rx.var
     def products_with_discounts(self) -> int:
-        return sum((1 for p in self.filtered_products if p["discount_value"] > 0))
+        return self._kpis.products_with_discounts
 
     @rx.var
     def avg_colors(self) -> float:
-        if not self.filtered_products:
-            return 0.0
-        products_with_colors = [
-            p for p in self.filtered_products if p["color_count"] > 0
-        ]
-        if not products_with_colors:
-            return 0.0
-        return round(
-            sum((p["color_count"] for p in products_with_colors))
-            / len(products_with_colors),
-            1,
-        )
+        return self._kpis.avg_colors
 
     @rx.var
     def category_stats(self) -> list[dict[str, str | int | float]]:
-        if not self.filtered_products:
-            return []
-        category_data = defaultdict(
-            lambda: {
-                "price_sum": 0,
-                "price_count": 0,
-                "discount_sum": 0,
-                "discount_count": 0,
-                "product_count": 0,
-                "color_sum": 0,
-                "color_count": 0,
-            }
-        )
-        for p in self.filtered_products:
-            cat = p["category"]
-            category_data[cat]["product_count"] += 1
-            if p["numeric_price"] > 0:
-                category_data[cat]["price_sum"] += p["numeric_price"]
-                category_data[cat]["price_count"] += 1
-            if p["discount_value"] > 0:
-                category_data[cat]["discount_sum"] += p["discount_value"]
-                category_data[cat]["discount_count"] += 1
-            if p["color_count"] > 0:
-                category_data[cat]["color_sum"] += p["color_count"]
-                category_data[cat]["color_count"] += 1
-        stats = []
-        for category, data in category_data.items():
-            stats.append(
-                {
-                    "name": category,
-                    "avg_price": round(data["price_sum"] / data["price_count"], 2)
-                    if data["price_count"] > 0
-                    else 0,
-                    "avg_discount": round(
-                        data["discount_sum"] / data["discount_count"], 2
-                    )
-                    if data["discount_count"] > 0
-                    else 0,
-                    "product_count": data["product_count"],
-                    "avg_colors": round(data["color_sum"] / data["color_count"], 1)
-                    if data["color_count"] > 0
-                    else 0,
-                }
+        """Per-category averages of the filtered products.
+
+        Category and discount filters are answered from the catalog's
+        precomputed partials; only search and price filters need a scan.
+        """
+        catalog = get_catalog(self.catalog_version)
+        if self.search_query or self._price_filtered:
+            groups = self._filter_result.derived(
+                "category_groups",
+                lambda: group_by_category(catalog.table, self._filtered_indices),
+            )
+        else:
+            selected = None
+            if self.selected_categories:
+                selected = catalog.table.category_selection(self.selected_categories)
+            groups = catalog.partials.category_groups(
+                selected, self.show_discounts_only
             )
-        return sorted(stats, key=lambda x: x["name"])
+        return sorted(category_stats(groups), key=lambda x: x["name"])
 
     @rx.var
     def top_10_expensive_products(self) -> list[Product]:
-        return sorted(
-            self.filtered_products, key=lambda p: p["numeric_price"], reverse=True
-        )[:10]
+        catalog = get_catalog(self.catalog_version)
+        top = self._filter_result.derived(
+            "top_numeric_price",
+            lambda: catalog.table.top_k("numeric_price", 10, self._filtered_indices),
+        )
+        return catalog.rows(top)
+
+    @rx.var
+    def top_10_discounted_products(self) -> list[Product]:
+        catalog = get_catalog(self.catalog_version)
+        top = self._filter_result.derived(
+            "top_discount_value",
+            lambda: catalog.table.top_k("discount_value", 10, self._filtered_indices),
+        )
+        return catalog.rows(top)
+
+    @rx.var
+    def top_10_colorful_products(self) -> list[Product]:
+        catalog = get_catalog(self.catalog_version)
+        top = self._filter_result.derived(
+            "top_color_count",
+            lambda: catalog.table.top_k("color_count", 10, self._filtered_indices),
+        )
+        return catalog.rows(top)
 
     @rx.var
     def all_categories(self) -> list[str]:
-        return sorted(list(set((p["category"] for p in self.products))))
+        return list(get_catalog(self.catalog_version).categories)
 
     @rx.var
     def max_price(self) -> float:
-        if not self.products:
-            return 1000.0
-        return max((p["numeric_price"] for p in self.products)) or 1000.0
+        return get_catalog(self.catalog_version).max_price or 1000.0
+
+    @rx.var(
+        deps=[
+            "catalog_version",
+            "search_query",
+            "selected_categories",
+            "price_range",
+            "_price_filtered",
+            "show_discounts_only",
+        ],
+        auto_deps=False,
+    )
+    def _filter_result(self) -> FilterResult:
+        """The products matching the current filters, shared across sessions.
+
+        `_previous_search` is only a hint for refining the previous result,
+        so it is not a dependency.
+        """
+        return select_cached(
+            get_catalog(self.catalog_version),
+            search=self.search_query,
+            categories=self.selected_categories,
+            price_range=self.price_range if self._price_filtered else None,
+            discounts_only=self.show_discounts_only,
+            previous_search=self._previous_search,
+        )
 
     @rx.var
-    def filtered_products(self) -> list[Product]:
-        filtered = self.products
-        if self.search_query:
-            filtered = [
-                p for p in filtered if self.search_query.lower() in p["title"].lower()
-            ]
-        if self.selected_categories:
-            filtered = [
-                p for p in filtered if p["category"] in self.selected_categories
-            ]
-        if self.price_range[0] > 0 or self.price_range[1] < self.max_price:
-            filtered = [
-                p
-                for p in filtered
-                if self.price_range[0] <= p["numeric_price"] <= self.price_range[1]
-            ]
-        if self.show_discounts_only:
-            filtered = [p for p in filtered if p["discount_value"] > 0]
-        return filtered
+    def _filtered_indices(self) -> np.ndarray:
+        """Catalog row indices of the products matching the current filters."""
+        return self._filter_result.indices
 
     @rx.var
     def active_filter_count(self) -> int:
@@ -313,10 +185,6 @@ class DashboardState(rx.State):
             count += 1
         return count
 
-    @rx.event
-    def set_search_query(self, query: str):
-        self.search_query = query
-
     @rx.event
     def set_selected_categories_list(self, category: str):
         if not category:
@@ -324,16 +192,14 @@ class DashboardState(rx.State):
         else:
             self.selected_categories = [category]
 
-    @rx.event
-    def set_price_range(self, pr: list[float]):
-        self.price_range = pr
-
     @rx.event
     def set_show_discounts_only(self, checked: bool):
         self.show_discounts_only = checked
 
     @rx.event
     def clear_filters(self):
+        self._pending_search = None
+        self._pending_price_range = None
         self.search_query = ""
         self.selected_categories = []
         self.price_range = [0, self.max_price]
@@ -0,0 +1,70 @@
+import asyncio
+from typing import ClassVar
+
+import reflex as rx
+
+# Search and price changes arriving within this many seconds of each other are
+# applied once, with the latest values, instead of each being filtered in turn.
+FILTER_SETTLE_SECONDS = 0.1
+
+
+class CatalogFilterState(rx.State, mixin=True):
+    """Mixin for the states that filter the catalog.
+
+    Subclasses define `search_query`, `_previous_search`, `price_range`,
+    `max_price` and the computed vars listed in `_transient_vars`.
+    """
+
+    _pending_search: str | None = None
+    _pending_price_range: list[float] | None = None
+    _filter_generation: int = 0
+    # Computed vars holding arrays sized by the catalog. Their cached values
+    # are left out of the pickled state and read back from the filter cache
+    # on next access.
+    _transient_vars: ClassVar[tuple[str, ...]] = ()
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for name in self._transient_vars:
+            state.pop(self.computed_vars[name]._cache_attr, None)
+        return state
+
+    @rx.var
+    def _price_filtered(self) -> bool:
+        """Whether the price range excludes any products."""
+        return self.price_range[0] > 0 or self.price_range[1] < self.max_price
+
+    def _schedule_filters(self):
+        """Apply the pending filter changes shortly, superseding any already scheduled."""
+        self._filter_generation += 1
+        return type(self).apply_pending_filters(self._filter_generation)
+
+    def _on_filters_applied(self):
+        """Hook run, with the state locked, after pending changes are applied."""
+
+    @rx.event(background=True)
+    async def apply_pending_filters(self, generation: int):
+        """Apply the pending search and price changes, unless newer ones have
+        been scheduled since: only the latest of a burst is ever filtered."""
+        await asyncio.sleep(FILTER_SETTLE_SECONDS)
+        async with self:
+            if generation != self._filter_generation:
+                return
+            if self._pending_search is not None:
+                self._previous_search = self.search_query
+                self.search_query = self._pending_search
+            if self._pending_price_range is not None:
+                self.price_range = self._pending_price_range
+            self._pending_search = None
+            self._pending_price_range = None
+            self._on_filters_applied()
+
+    @rx.event
+    def set_search_query(self, query: str):
+        self._pending_search = query
+        return self._schedule_filters()
+
+    @rx.event
+    def set_price_range(self, pr: list[float]):
+        self._pending_price_range = pr
+        return self._schedule_filters()
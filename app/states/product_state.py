@@ -1,119 +1,303 @@
 import reflex as rx
-from app.states.dashboard_state import DashboardState, Product
-from typing import Literal
+from app.states.dashboard_state import Product
+from app.data.aggregates import Facets, bucket_labels, compute_facets
+from app.data.catalog import get_catalog
+from app.data.filter_cache import FilterResult, select_cached
+from app.data.loader import ensure_catalog
+from app.data.user_lists import COMPARE, WISHLIST, user_lists
+from app.states.filters import CatalogFilterState
+from typing import Literal, TypedDict
 import asyncio
-from collections import defaultdict
+import logging
+import uuid
+import numpy as np
 
 SortOptions = Literal[
-    "default", "price_asc", "price_desc", "discount_desc", "name_asc", "colors_desc"
+    "default",
+    "relevance",
+    "price_asc",
+    "price_desc",
+    "discount_desc",
+    "name_asc",
+    "colors_desc",
 ]
+SORT_ORDERINGS = {
+    "price_asc": ("numeric_price", False),
+    "price_desc": ("numeric_price", True),
+    "discount_desc": ("discount_value", True),
+    "name_asc": ("titles", False),
+    "colors_desc": ("color_count", True),
+}
+SEARCH_INPUT_ID = "product-search"
+SUGGESTION_LIMIT = 8
+# Only the current page of products is synced to the client, so its size is capped.
+MAX_ITEMS_PER_PAGE = 96
+MAX_COMPARED_PRODUCTS = 4
+# What the filtered products depend on. `_previous_search` is left out: it only
+# lets a refined search start from the previous result.
+FILTER_DEPS = [
+    "catalog_version",
+    "search_query",
+    "selected_categories",
+    "price_range",
+    "_price_filtered",
+    "show_discounts_only",
+    "_rank_by_relevance",
+]
+PRICE_FACET_LABELS = bucket_labels("price", prefix="$")
+DISCOUNT_FACET_LABELS = ["No discount"] + bucket_labels("discount", suffix="%")
+
+
+class Suggestion(TypedDict):
+    text: str
+    kind: Literal["term", "category"]
+    count: int
+
 
+class FacetCount(TypedDict):
+    label: str
+    count: int
 
-class ProductState(rx.State):
-    products: list[Product] = []
+
+class ProductState(CatalogFilterState, rx.State):
+    catalog_version: str = ""
+    shopper_id: str = rx.LocalStorage(name="shopper_id")
     view_mode: Literal["grid", "list"] = "grid"
     sort_by: SortOptions = "default"
+    _rank_by_relevance: bool = False
     search_query: str = ""
+    _previous_search: str = ""
+    search_input: str = ""
+    show_suggestions: bool = False
     selected_categories: list[str] = []
     price_range: list[float] = [0, 500]
     show_discounts_only: bool = False
-    wishlist: set[str] = set()
-    compare_products: set[str] = set()
+    _wishlist: set[int] = set()
+    compare_products: set[int] = set()
     items_per_page: int = 24
     current_page: int = 1
     show_product_modal: bool = False
-    selected_product: Product | None = None
+    selected_product_id: int | None = None
     show_compare_modal: bool = False
     ai_recommendations: list[dict] = []
     is_loading_recommendations: bool = False
+    _transient_vars = (
+        "_filter_result",
+        "_filtered_indices",
+        "_filtered_mask",
+        "_facets",
+        "_relevance_order",
+        "_page_indices",
+    )
 
-    @rx.event
+    @rx.event(background=True)
     async def on_load(self):
-        dashboard_state = await self.get_state(DashboardState)
-        if not dashboard_state.products:
-            pass
-        self.products = dashboard_state.products
-        if self.products:
-            max_price = max((p["numeric_price"] for p in self.products), default=500)
-            self.price_range = [0, max_price]
-
-    @rx.var
-    def filtered_products(self) -> list[Product]:
-        """Products filtered by search, category, price, and discounts."""
-        filtered = self.products
-        if self.search_query:
-            filtered = [
-                p for p in filtered if self.search_query.lower() in p["title"].lower()
-            ]
-        if self.selected_categories:
-            filtered = [
-                p for p in filtered if p["category"] in self.selected_categories
-            ]
-        if self.price_range[0] > 0 or self.price_range[1] < self.max_price:
-            filtered = [
-                p
-                for p in filtered
-                if self.price_range[0] <= p["numeric_price"] <= self.price_range[1]
-            ]
-        if self.show_discounts_only:
-            filtered = [p for p in filtered if p["discount_value"] > 0]
-        return filtered
-
-    @rx.var
-    def sorted_products(self) -> list[Product]:
-        """Filtered products sorted based on the selected criteria."""
-        products = self.filtered_products
-        if self.sort_by == "price_asc":
-            return sorted(products, key=lambda p: p["numeric_price"])
-        if self.sort_by == "price_desc":
-            return sorted(products, key=lambda p: p["numeric_price"], reverse=True)
-        if self.sort_by == "discount_desc":
-            return sorted(products, key=lambda p: p["discount_value"], reverse=True)
-        if self.sort_by == "name_asc":
-            return sorted(products, key=lambda p: p["title"])
-        if self.sort_by == "colors_desc":
-            return sorted(products, key=lambda p: p["color_count"], reverse=True)
-        return products
+        async with self:
+            # Read past the cache, in case another worker changed the lists.
+            shopper_id = self._shopper()
+            self._wishlist = set(
+                await asyncio.to_thread(user_lists.get, shopper_id, WISHLIST, True)
+            )
+            self.compare_products = set(
+                await asyncio.to_thread(user_lists.get, shopper_id, COMPARE, True)
+            )
+        try:
+            catalog = await ensure_catalog()
+        except Exception as e:
+            logging.exception(f"Failed to load data: {e}")
+            return
+        async with self:
+            self.catalog_version = catalog.version
+            if catalog.products:
+                self.price_range = [0, catalog.max_price]
+
+    def _shopper(self) -> str:
+        """This browser's id in the wishlist and compare store, assigned on first use."""
+        if not self.shopper_id:
+            self.shopper_id = uuid.uuid4().hex
+        return self.shopper_id
+
+    @rx.var(deps=FILTER_DEPS, auto_deps=False)
+    def _filter_result(self) -> FilterResult:
+        """The products matching search, category, price, and discount filters.
+
+        When sorting by relevance the search matches terms with typos allowed
+        instead of the exact title substring. Either way the result comes from
+        the cross-session filter cache.
+        """
+        return select_cached(
+            get_catalog(self.catalog_version),
+            search=self.search_query,
+            categories=self.selected_categories,
+            price_range=self.price_range if self._price_filtered else None,
+            discounts_only=self.show_discounts_only,
+            previous_search=self._previous_search,
+            ranked=self._rank_by_relevance,
+        )
 
     @rx.var
-    def paginated_products(self) -> list[Product]:
-        """The products to display on the current page."""
+    def _filtered_indices(self) -> np.ndarray:
+        """Catalog row indices of the products matching the current filters."""
+        return self._filter_result.indices
+
+    @rx.var
+    def _filtered_mask(self) -> np.ndarray:
+        """Boolean mask over catalog rows of `_filtered_indices`."""
+        size = len(get_catalog(self.catalog_version).table)
+
+        def build_mask():
+            mask = np.zeros(size, dtype=bool)
+            mask[self._filtered_indices] = True
+            return mask
+
+        return self._filter_result.derived("mask", build_mask)
+
+    @rx.var(deps=[*FILTER_DEPS, "_filter_result"], auto_deps=False)
+    def _facets(self) -> Facets:
+        """Sidebar facet counts, each under every filter except its own."""
+        catalog = get_catalog(self.catalog_version)
+        search_rows = select_cached(
+            catalog,
+            search=self.search_query,
+            previous_search=self._previous_search,
+            ranked=self._rank_by_relevance,
+        ).indices
+        categories = self.selected_categories
+        price_range = self.price_range if self._price_filtered else None
+        discounts_only = self.show_discounts_only
+        return self._filter_result.derived(
+            "facets",
+            lambda: compute_facets(
+                catalog.table, search_rows, categories, price_range, discounts_only
+            ),
+        )
+
+    @rx.var
+    def _relevance_order(self) -> np.ndarray:
+        """Filtered row indices by descending search relevance; empty unless sorting by it."""
+        if self.sort_by != "relevance" or not self.search_query.strip():
+            return np.empty(0, dtype=np.int64)
+        catalog = get_catalog(self.catalog_version)
+        query = self.search_query
+        indices = self._filtered_indices
+
+        def order():
+            ranked = select_cached(catalog, query, ranked=True)
+            scores = ranked.derived(
+                "scores", lambda: catalog.table.term_index.search(query)[1]
+            )
+            keys = -scores[np.searchsorted(ranked.indices, indices)]
+            return indices[np.argsort(keys, kind="stable")]
+
+        return self._filter_result.derived("relevance_order", order)
+
+    @rx.var
+    def _page_indices(self) -> np.ndarray:
+        """Row indices of the current page, in the selected order.
+
+        Column sorts read the page off the catalog's precomputed permutation,
+        so changing page does not re-sort the filtered rows.
+        """
         start = (self.current_page - 1) * self.items_per_page
         end = start + self.items_per_page
-        return self.sorted_products[start:end]
+        if self.sort_by in SORT_ORDERINGS:
+            return get_catalog(self.catalog_version).table.ordered_slice(
+                SORT_ORDERINGS[self.sort_by],
+                self._filtered_indices,
+                self._filtered_mask,
+                start,
+                end,
+            )
+        if self.sort_by == "relevance" and self.search_query.strip():
+            return self._relevance_order[start:end]
+        return self._filtered_indices[start:end]
+
+    @rx.var
+    def filtered_count(self) -> int:
+        """The number of products matching the current filters."""
+        return len(self._filtered_indices)
+
+    @rx.var
+    def paginated_products(self) -> list[Product]:
+        """The products to display on the current page."""
+        return get_catalog(self.catalog_version).rows(self._page_indices)
 
     @rx.var
     def total_pages(self) -> int:
         """The total number of pages."""
-        return -(-len(self.filtered_products) // self.items_per_page)
+        return -(-self.filtered_count // self.items_per_page)
 
     @rx.var
     def all_categories(self) -> list[str]:
         """All unique categories from the full product list."""
-        return sorted(list(set((p["category"] for p in self.products))))
+        return list(get_catalog(self.catalog_version).categories)
 
     @rx.var
     def category_counts(self) -> dict[str, int]:
-        """Count of products per category in the full list."""
-        counts = defaultdict(int)
-        for p in self.products:
-            counts[p["category"]] += 1
-        return counts
+        """Count of products per category under the search, price and discount filters."""
+        categories = get_catalog(self.catalog_version).table.categories
+        return dict(zip(categories, self._facets.categories.tolist()))
+
+    @rx.var
+    def price_facets(self) -> list[FacetCount]:
+        """Count of products per price bucket under the other filters."""
+        return [
+            {"label": label, "count": count}
+            for label, count in zip(
+                PRICE_FACET_LABELS, self._facets.price_buckets.tolist()
+            )
+        ]
+
+    @rx.var
+    def discount_facets(self) -> list[FacetCount]:
+        """Count of products per discount bucket under the other filters."""
+        return [
+            {"label": label, "count": count}
+            for label, count in zip(
+                DISCOUNT_FACET_LABELS, self._facets.discount_buckets.tolist()
+            )
+        ]
 
     @rx.var
     def max_price(self) -> float:
-        if not self.products:
-            return 500.0
-        return max((p["numeric_price"] for p in self.products), default=500.0)
+        catalog = get_catalog(self.catalog_version)
+        return catalog.max_price if catalog.products else 500.0
+
+    @rx.var
+    def search_suggestions(self) -> list[Suggestion]:
+        """Title terms and categories completing the word being typed, most frequent first."""
+        if not self.show_suggestions or not self.search_input[-1:].isalnum():
+            return []
+        completions = get_catalog(self.catalog_version).table.completions
+        return [
+            {"text": text, "kind": kind, "count": count}
+            for text, kind, count in completions.complete(
+                self.search_input.split()[-1], SUGGESTION_LIMIT
+            )
+        ]
 
     @rx.var
     def wishlist_count(self) -> int:
-        return len(self.wishlist)
+        return len(self._wishlist)
 
     @rx.var
     def compare_count(self) -> int:
         return len(self.compare_products)
 
+    @rx.var
+    def selected_product(self) -> Product | None:
+        """The product shown in the product modal."""
+        if self.selected_product_id is None:
+            return None
+        return get_catalog(self.catalog_version).product(self.selected_product_id)
+
+    @rx.var
+    def compared_products(self) -> list[Product]:
+        """The products being compared, in id order."""
+        return get_catalog(self.catalog_version).products_by_id(
+            sorted(self.compare_products)
+        )
+
     @rx.var
     def active_filter_count(self) -> int:
         count = 0
@@ -134,11 +318,41 @@ class ProductState(rx.State):
     @rx.event
     def set_sort_by(self, sort_option: SortOptions):
         self.sort_by = sort_option
+        # Only ranking by relevance changes which products match, so the
+        # filter results are left alone when switching between column sorts.
+        if self._rank_by_relevance != (sort_option == "relevance"):
+            self._rank_by_relevance = sort_option == "relevance"
+        self.current_page = 1
+
+    def _on_filters_applied(self):
+        self.current_page = 1
+
+    @rx.event
+    def set_search_input(self, text: str):
+        self.search_input = text
+        self.show_suggestions = True
+
+    @rx.event
+    def hide_suggestions(self):
+        self.show_suggestions = False
 
     @rx.event
-    def set_search_query(self, query: str):
-        self.search_query = query
+    def apply_suggestion(self, suggestion: Suggestion):
+        """Complete the word being typed, or turn it into a category filter."""
+        words = self.search_input.split()[:-1]
+        if suggestion["kind"] == "category":
+            if suggestion["text"] not in self.selected_categories:
+                self.selected_categories.append(suggestion["text"])
+        else:
+            words.append(suggestion["text"])
+        text = " ".join(words)
+        self.search_input = text
+        self._pending_search = None
+        self._previous_search = self.search_query
+        self.search_query = text
+        self.show_suggestions = False
         self.current_page = 1
+        return rx.set_value(SEARCH_INPUT_ID, text)
 
     @rx.event
     def toggle_category_filter(self, category: str):
@@ -148,37 +362,39 @@ class ProductState(rx.State):
             self.selected_categories.append(category)
         self.current_page = 1
 
-    @rx.event
-    def set_price_range(self, pr: list[float]):
-        self.price_range = pr
-        self.current_page = 1
-
     @rx.event
     def set_show_discounts_only(self, checked: bool):
         self.show_discounts_only = checked
         self.current_page = 1
 
     @rx.event
-    def toggle_wishlist(self, product_title: str):
-        if product_title in self.wishlist:
-            self.wishlist.remove(product_title)
-        else:
-            self.wishlist.add(product_title)
+    async def toggle_wishlist(self, product_id: int):
+        self._wishlist = set(
+            await asyncio.to_thread(
+                user_lists.toggle, self._shopper(), WISHLIST, product_id
+            )
+        )
 
     @rx.event
-    def toggle_compare(self, product_title: str):
-        if product_title in self.compare_products:
-            self.compare_products.remove(product_title)
-        elif len(self.compare_products) < 4:
-            self.compare_products.add(product_title)
+    async def toggle_compare(self, product_id: int):
+        self.compare_products = set(
+            await asyncio.to_thread(
+                user_lists.toggle,
+                self._shopper(),
+                COMPARE,
+                product_id,
+                MAX_COMPARED_PRODUCTS,
+            )
+        )
 
     @rx.event
-    def clear_compare(self):
+    async def clear_compare(self):
+        await asyncio.to_thread(user_lists.remove_all, self._shopper(), COMPARE)
         self.compare_products = set()
 
     @rx.event
     def set_items_per_page(self, count: int):
-        self.items_per_page = int(count)
+        self.items_per_page = min(max(int(count), 1), MAX_ITEMS_PER_PAGE)
         self.current_page = 1
 
     @rx.event
@@ -186,14 +402,14 @@ class ProductState(rx.State):
         self.current_page = int(page_num)
 
     @rx.event
-    def open_product_modal(self, product: Product):
-        self.selected_product = product
+    def open_product_modal(self, product_id: int):
+        self.selected_product_id = product_id
         self.show_product_modal = True
 
     @rx.event
     def close_product_modal(self):
         self.show_product_modal = False
-        self.selected_product = None
+        self.selected_product_id = None
 
     @rx.event
     def open_compare_modal(self):
@@ -205,29 +421,38 @@ class ProductState(rx.State):
 
     @rx.event
     def clear_all_filters(self):
+        self._pending_search = None
+        self._pending_price_range = None
         self.search_query = ""
+        self.search_input = ""
         self.selected_categories = []
         self.price_range = [0, self.max_price]
         self.show_discounts_only = False
         self.current_page = 1
 
     @rx.event(background=True)
-    async def generate_recommendations(self, product: Product):
+    async def generate_recommendations(self, product_id: int):
         async with self:
             self.is_loading_recommendations = True
             self.ai_recommendations = []
         await asyncio.sleep(2)
         async with self:
-            similar_products = [
-                p
-                for p in self.products
-                if p["category"] == product["category"]
-                and p["title"] != product["title"]
-            ][:5]
+            catalog = get_catalog(self.catalog_version)
+            table = catalog.table
+            row = table.row_of(product_id)
+            similar_rows = table.ids[:0]
+            if row is not None:
+                similar_rows = np.flatnonzero(
+                    table.category_codes == table.category_codes[row]
+                )
+                similar_rows = similar_rows[
+                    table.titles[similar_rows] != table.titles[row]
+                ][:5]
             recommendations = []
-            for p in similar_products:
+            for p in catalog.rows(similar_rows):
                 recommendations.append(
                     {
+                        "id": p["id"],
                         "title": p["title"],
                         "reason": f"Similar style in the {p['category']} category.",
                     }
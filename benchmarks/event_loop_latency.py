@@ -0,0 +1,84 @@
+"""Event loop latency seen by other sessions while the catalog is parsed.
+
+Runs the CSV ingest three ways while a probe coroutine keeps scheduling short
+sleeps, standing in for other sessions' events, and reports how late those
+wake-ups were:
+
+    python -m benchmarks.event_loop_latency [DATASET_DIR]
+
+Without DATASET_DIR the Kaggle dataset is downloaded (or reused) first.
+"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import statistics
+
+import kagglehub
+
+from app.data.ingest import ingest_workers, load_category_file, load_category_files
+from app.data.loader import DATASET_HANDLE
+
+PROBE_INTERVAL = 0.005
+
+
+async def probe(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def measure(load) -> tuple[float, list[float]]:
+    stop = asyncio.Event()
+    lags = []
+    probe_task = asyncio.create_task(probe(stop, lags))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await load()
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+    return elapsed, lags
+
+
+def report(name: str, elapsed: float, lags: list[float]) -> None:
+    lags_ms = sorted(lag * 1000 for lag in lags) or [0.0]
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    print(
+        f"{name:<22} load {elapsed:6.2f}s  events {len(lags_ms):5d}  "
+        f"p50 {statistics.median(lags_ms):7.1f}ms  p99 {p99:7.1f}ms  "
+        f"max {lags_ms[-1]:7.1f}ms"
+    )
+
+
+async def main(path: str) -> None:
+    files = sorted(f for f in os.listdir(path) if f.endswith(".csv"))
+
+    async def inline():
+        # The pre-offload behaviour: parse on the event loop thread.
+        for file in files:
+            load_category_file(path, file)
+
+    async def thread():
+        await load_category_files(path, files, 1)
+
+    async def processes():
+        await load_category_files(path, files, max(ingest_workers(), 2))
+
+    for name, load in [
+        ("on event loop", inline),
+        ("worker thread", thread),
+        ("process pool", processes),
+    ]:
+        report(name, *await measure(load))
+
+
+if __name__ == "__main__":
+    logging.disable(logging.WARNING)
+    dataset = (
+        sys.argv[1] if len(sys.argv) > 1 else kagglehub.dataset_download(DATASET_HANDLE)
+    )
+    asyncio.run(main(dataset))
@@ -0,0 +1,72 @@
+import random
+
+import pytest
+from reflex.state import BaseState, State
+
+from app.data.catalog import Product, publish_catalog
+from app.data.filter_cache import filter_cache
+from app.data.user_lists import UserListStore
+from app.states import product_state
+
+CATEGORIES = [f"Category {i}" for i in range(20)]
+WORDS = (
+    "floral summer maxi dress cotton linen top shirt tee sneaker "
+    "ring necklace gold silver tote bag kids cute"
+).split()
+
+
+def make_products(count: int, seed: int = 0) -> list[Product]:
+    """`count` random products, grouped by category like the scraped CSVs."""
+    rng = random.Random(seed)
+    products = []
+    for i in range(count):
+        price = round(rng.uniform(1, 300), 2)
+        discount = rng.choice([0, 0, 10, 25, 40])
+        products.append(
+            {
+                "id": i,
+                "category": CATEGORIES[i * len(CATEGORIES) // count],
+                "title": " ".join(rng.choice(WORDS) for _ in range(5)),
+                "price_str": f"${price}",
+                "numeric_price": price,
+                "discount_str": f"-{discount}%" if discount else None,
+                "discount_value": float(discount),
+                "color_count": rng.randint(0, 12),
+                "selling_proposition": None,
+            }
+        )
+    return products
+
+
+@pytest.fixture(autouse=True)
+def empty_filter_cache():
+    filter_cache.clear()
+    yield
+    filter_cache.clear()
+
+
+@pytest.fixture
+def load_state():
+    """Publish a synthetic catalog of `count` products and return a fresh root
+    state with its `cls` substate loaded on it, changes already cleaned."""
+
+    def load(cls: type[BaseState], count: int) -> tuple[State, BaseState]:
+        version = f"test-{count}"
+        catalog = publish_catalog(version, make_products(count))
+        root = State(_reflex_internal_init=True)
+        state = root.get_substate(cls.get_full_name().split(".")[1:])
+        state.catalog_version = version
+        state.price_range = [0, catalog.max_price]
+        root.get_delta()
+        root._clean()
+        return root, state
+
+    return load
+
+
+@pytest.fixture
+def user_lists(tmp_path, monkeypatch) -> UserListStore:
+    """A wishlist and compare store in a temporary database, used by ProductState."""
+    store = UserListStore(str(tmp_path / "user_lists.sqlite3"), max_cached_lists=100)
+    monkeypatch.setattr(product_state, "user_lists", store)
+    return store
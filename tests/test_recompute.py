@@ -0,0 +1,70 @@
+import asyncio
+import collections
+
+import pytest
+
+from app.states.product_state import ProductState
+
+# Computed vars scanning the filtered rows, which only filter changes may rerun.
+FILTER_VARS = ("_filter_result", "_facets", "category_counts")
+
+
+@pytest.fixture
+def recomputes(session):
+    """Counts of how often each of `FILTER_VARS` is computed once `session`
+    has loaded."""
+    counts = collections.Counter()
+    originals = {}
+    for name in FILTER_VARS:
+        var = ProductState.__dict__[name]
+        originals[name] = fget = var._fget
+
+        def counted(state, fget=fget, name=name):
+            counts[name] += 1
+            return fget(state)
+
+        object.__setattr__(var, "_fget", counted)
+    yield counts
+    for name, fget in originals.items():
+        object.__setattr__(ProductState.__dict__[name], "_fget", fget)
+
+
+@pytest.fixture
+def session(load_state, user_lists):
+    root, state = load_state(ProductState, 2_000)
+    first = state.paginated_products[0]["id"]
+
+    def run(event) -> None:
+        event(state, first)
+        root.get_delta()
+        root._clean()
+
+    return run
+
+
+@pytest.mark.parametrize(
+    "event",
+    [
+        lambda state, product_id: state.set_view_mode("list"),
+        lambda state, product_id: asyncio.run(state.toggle_wishlist(product_id)),
+        lambda state, product_id: asyncio.run(state.toggle_compare(product_id)),
+        lambda state, product_id: state.open_product_modal(product_id),
+        lambda state, product_id: state.set_sort_by("price_asc"),
+        lambda state, product_id: state.set_current_page(2),
+    ],
+    ids=["view_mode", "wishlist", "compare", "product_modal", "sort", "page"],
+)
+def test_event_leaves_filter_results_alone(session, recomputes, event):
+    session(event)
+    assert not recomputes
+
+
+def test_column_sort_changes_leave_filter_results_alone(session, recomputes):
+    session(lambda state, product_id: state.set_sort_by("price_desc"))
+    session(lambda state, product_id: state.set_sort_by("name_asc"))
+    assert not recomputes
+
+
+def test_filter_change_recomputes(session, recomputes):
+    session(lambda state, product_id: state.toggle_category_filter("Category 3"))
+    assert recomputes == {name: 1 for name in FILTER_VARS}
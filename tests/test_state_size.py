@@ -0,0 +1,82 @@
+import asyncio
+import pickle
+
+import pytest
+from reflex.utils.format import json_dumps
+
+from app.states.dashboard_state import DashboardState
+from app.states.product_state import MAX_ITEMS_PER_PAGE, ProductState
+
+CATALOG_SIZES = (1_000, 50_000)
+
+
+@pytest.mark.parametrize("cls", [ProductState, DashboardState])
+def test_pickled_state_does_not_grow_with_catalog(load_state, cls):
+    sizes = []
+    for count in CATALOG_SIZES:
+        root, state = load_state(cls, count)
+        state.search_query = "dress"
+        if cls is ProductState:
+            state.set_sort_by("relevance")
+        root.get_delta()
+        for name in cls._transient_vars:
+            getattr(state, name)
+        sizes.append(len(pickle.dumps(state)))
+    assert sizes[-1] - sizes[0] < 256
+    assert sizes[-1] < 16 * 1024
+
+
+def test_unpickled_state_reads_results_back(load_state):
+    root, state = load_state(ProductState, 1_000)
+    state.search_query = "dress"
+    root.get_delta()
+    restored = pickle.loads(pickle.dumps(state))
+    assert restored.filtered_count == state.filtered_count > 0
+    assert restored.paginated_products == state.paginated_products
+
+
+def shopping_session(state: ProductState) -> list:
+    """Filter, sort, page and list events of a typical visit, in order."""
+
+    def first() -> int:
+        return state.paginated_products[0]["id"]
+
+    category = state.all_categories[3]
+    return [
+        lambda: state.apply_suggestion({"text": "dress", "kind": "term", "count": 0}),
+        lambda: state.set_sort_by("price_desc"),
+        lambda: state.set_current_page(2),
+        lambda: asyncio.run(state.toggle_wishlist(first())),
+        lambda: asyncio.run(state.toggle_compare(first())),
+        lambda: state.open_product_modal(first()),
+        lambda: state.close_product_modal(),
+        lambda: state.toggle_category_filter(category),
+        lambda: state.set_show_discounts_only(True),
+        lambda: state.set_items_per_page(MAX_ITEMS_PER_PAGE),
+        lambda: state.toggle_category_filter(category),
+        lambda: state.set_sort_by("relevance"),
+        lambda: asyncio.run(state.toggle_wishlist(first())),
+        lambda: state.clear_all_filters(),
+    ]
+
+
+def test_session_payloads_do_not_grow_with_catalog(load_state, user_lists):
+    largest = {}
+    for count in CATALOG_SIZES:
+        root, state = load_state(ProductState, count)
+        sizes = largest[count] = {"delta": 0, "dict": 0, "pickle": 0}
+        for event in shopping_session(state):
+            event()
+            delta = root.get_delta()
+            root._clean()
+            sizes["delta"] = max(sizes["delta"], len(json_dumps(delta)))
+            sizes["dict"] = max(sizes["dict"], len(json_dumps(state.dict())))
+            sizes["pickle"] = max(sizes["pickle"], len(pickle.dumps(state)))
+    small, large = largest[CATALOG_SIZES[0]], largest[CATALOG_SIZES[-1]]
+    # Only the current page of products is ever sent.
+    page_bound = MAX_ITEMS_PER_PAGE * 512 + 8 * 1024
+    assert large["delta"] < page_bound
+    assert large["dict"] < page_bound
+    assert large["pickle"] < page_bound
+    for kind in ("delta", "dict", "pickle"):
+        assert large[kind] < small[kind] * 1.1 + 1024
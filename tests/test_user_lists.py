@@ -0,0 +1,103 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.data.user_lists import COMPARE, WISHLIST, UserListStore
+
+
+def stored(store: UserListStore, user_id: str) -> set[int]:
+    rows = store._db().execute(
+        "SELECT product_id FROM user_list_items WHERE user_id = ?", (user_id,)
+    )
+    return {product_id for (product_id,) in rows}
+
+
+def test_flush_writes_pending_changes(user_lists):
+    user_lists.add("shopper", WISHLIST, 1)
+    user_lists.add("shopper", WISHLIST, 2)
+    user_lists.remove("shopper", WISHLIST, 1)
+    user_lists.flush()
+    assert stored(user_lists, "shopper") == {2}
+    user_lists.clear_cache()
+    assert user_lists.get("shopper", WISHLIST) == {2}
+
+
+def test_failed_flush_keeps_the_batch_behind_newer_changes(user_lists):
+    user_lists.add("shopper", WISHLIST, 1)
+    user_lists.add("shopper", WISHLIST, 2)
+    connection = user_lists._db()
+    connection.execute(
+        "CREATE TRIGGER fail BEFORE INSERT ON user_list_items"
+        " BEGIN SELECT RAISE(ABORT, 'disk full'); END"
+    )
+
+    def remove_during_write(statement: str):
+        if statement.startswith("INSERT"):
+            user_lists.remove("shopper", WISHLIST, 1)
+
+    connection.set_trace_callback(remove_during_write)
+    with pytest.raises(sqlite3.Error):
+        user_lists.flush()
+    connection.set_trace_callback(None)
+    connection.execute("DROP TRIGGER fail")
+    assert stored(user_lists, "shopper") == set()
+
+    user_lists.flush()
+    assert stored(user_lists, "shopper") == {2}
+
+
+def test_toggle_respects_max_items(user_lists):
+    assert user_lists.toggle("shopper", WISHLIST, 1, max_items=2) == {1}
+    assert user_lists.toggle("shopper", WISHLIST, 2, max_items=2) == {1, 2}
+    assert user_lists.toggle("shopper", WISHLIST, 3, max_items=2) == {1, 2}
+    assert user_lists.toggle("shopper", WISHLIST, 1, max_items=2) == {2}
+
+
+def test_full_batch_wakes_the_flusher_instead_of_flushing(tmp_path):
+    store = UserListStore(str(tmp_path / "lists.sqlite3"), 10, batch_size=2)
+    store.add("shopper", WISHLIST, 1)
+    assert not store.wait_for_batch(0)
+    store.add("shopper", WISHLIST, 2)
+    assert store.wait_for_batch(0)
+    assert stored(store, "shopper") == set()
+    store.flush()
+    assert not store.wait_for_batch(0)
+    assert stored(store, "shopper") == {1, 2}
+
+
+def test_concurrent_toggles_respect_max_items(user_lists, monkeypatch):
+    get = user_lists.get
+
+    def slow_get(*args, **kwargs):
+        # Let the other toggles run between reading the list and changing it.
+        items = get(*args, **kwargs)
+        time.sleep(0.01)
+        return items
+
+    monkeypatch.setattr(user_lists, "get", slow_get)
+    start = threading.Barrier(8)
+
+    def toggle(product_id: int):
+        start.wait()
+        user_lists.toggle("shopper", COMPARE, product_id, max_items=3)
+
+    threads = [threading.Thread(target=toggle, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(user_lists.get("shopper", COMPARE)) == 3
+    user_lists.flush()
+    assert len(stored(user_lists, "shopper")) == 3
+
+
+def test_refresh_sees_changes_from_another_worker(tmp_path):
+    path = str(tmp_path / "lists.sqlite3")
+    here, there = UserListStore(path, 10), UserListStore(path, 10)
+    assert here.get("shopper", WISHLIST) == set()
+    there.add("shopper", WISHLIST, 1)
+    there.flush()
+    assert here.get("shopper", WISHLIST) == set()
+    assert here.get("shopper", WISHLIST, refresh=True) == {1}